@@ -1,228 +1,376 @@
-from selenium import webdriver
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Comment
 import pandas as pd
-import time
+import argparse
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fetcher import fetch_pages
+from page_cache import CACHE_DIR, DEFAULT_TTL, CacheMiss, PageCache
+from player_store import PlayerStore
+from table_schema import COLUMNS, INFO_FIELDS, SECTIONS, format_csv_columns, read_table, write_parquet
 
 
 # ========== Thiết lập thư mục lưu kết quả ========== 
 BASE_DIR = os.path.join('REPORT_BTL', 'BTL1_File')  # Thay đổi đường dẫn đến thư mục mong muốn
 os.makedirs(BASE_DIR, exist_ok=True)
 
-# ==== Cấu hình trình duyệt ====
-def init_driver():
-    return webdriver.Chrome()
+FBREF_HOST = 'https://fbref.com'
+MANIFEST_FILE = 'scrape_manifest.json'
+SHARD_DIR = 'shards'
+SHARD_INDEX = 'index.json'
+
+# ==== Các giải đấu: tên viết tắt -> (id fbref, tên trong URL) ====
+COMPETITIONS = {
+    'EPL': (9, 'Premier-League'),
+    'LaLiga': (12, 'La-Liga'),
+    'SerieA': (11, 'Serie-A'),
+    'Bundesliga': (20, 'Bundesliga'),
+    'Ligue1': (13, 'Ligue-1'),
+}
+TABLE_CLASS = 'min_width sortable stats_table shade_zero now_sortable sticky_table eq2 re2 le2'
+
+# lxml nhanh hơn nhiều so với html.parser; dùng nếu đã cài
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# ==== Trang cần JavaScript nếu HTML không chứa bảng cầu thủ (kể cả trong comment) ====
+def has_player_table(html):
+    return 'data-append-csv' in html
 
-# ==== Lấy BeautifulSoup từ URL ====
-def get_soup(driver, url):
-    driver.get(url)
-    time.sleep(0.5)
-    return BeautifulSoup(driver.page_source, 'html.parser')
+# ==== Cắt riêng đoạn HTML của bảng cầu thủ (không cần parse cả trang) ====
+def extract_player_table_html(html):
+    pos = html.find('data-append-csv')
+    if pos < 0:
+        return None
+    start = html.rfind('<table', 0, pos)
+    end = html.find('</table>', pos)
+    if start < 0 or end < 0:
+        return None
+    return html[start:end + len('</table>')]
 
-# ==== Trích xuất dữ liệu theo fields từ một <tr> ====
-def extract_data(tr, fields):
+# ==== Dấu vân tay của bảng cầu thủ trong một trang, kèm ánh xạ field -> cột của bảng đó ====
+# Đổi danh sách field trong table_schema cũng làm đổi dấu vân tay, nên --incremental parse lại bảng
+def fingerprint_page(html, field_map):
+    table_html = extract_player_table_html(html) or html
+    digest = hashlib.sha256(json.dumps(list(field_map.items())).encode('utf-8'))
+    digest.update(table_html.encode('utf-8'))
+    return digest.hexdigest()
+
+# ==== Lấy BeautifulSoup từ các trang đã tải ====
+def get_soup(pages, url):
+    html = pages[url]
+    table_html = extract_player_table_html(html)
+    return BeautifulSoup(table_html or html, HTML_PARSER)
+
+# ==== Tìm bảng cầu thủ trong trang ====
+def find_player_table(soup):
+    # Trang đã render bằng trình duyệt
+    table = soup.find('table', {'class': TABLE_CLASS})
+    if table:
+        return table
+
+    # HTML thô: fbref để các bảng phụ trong comment, JS mới bỏ comment ra
+    for table in soup.find_all('table'):
+        if table.find('td', {'data-append-csv': True}):
+            return table
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        if 'data-append-csv' in comment:
+            table = BeautifulSoup(comment, HTML_PARSER).find('table')
+            if table:
+                return table
+    return None
+
+# ==== Duyệt một <tr> đúng một lần: data-stat -> <td>, kèm id cầu thủ ====
+def parse_row(tr):
+    cells = {}
+    player_id = None
+    for td in tr.find_all('td', recursive=False):
+        stat = td.get('data-stat')
+        if stat and stat not in cells:
+            cells[stat] = td
+        if player_id is None and td.has_attr('data-append-csv'):
+            player_id = td['data-append-csv'].strip()
+    return cells, player_id
+
+# ==== Trích xuất dữ liệu theo fields từ các ô của một <tr> ====
+def extract_data(cells, fields):
     row = []
     for field in fields:
-        td = tr.find("td", {"data-stat": field})
+        td = cells.get(field)
         value = td.text.strip() if td else 'N/a'
         row.append(value if value != '' else 'N/a')
     return row
 
+# ==== Ghép field của từng bảng với tên cột (theo thứ tự khai báo) ====
+def map_section_fields(columns, info_fields, sections):
+    names = [col[-1] for col in columns]
+    field_lists = [info_fields] + [fields for _, fields in sections]
+    total = sum(len(fields) for fields in field_lists)
+    if total != len(names):
+        raise ValueError(f"{total} fields declared for {len(names)} columns")
+
+    mappings = []
+    x = 0
+    for fields in field_lists:
+        mapping = dict(zip(fields, names[x:x + len(fields)]))
+        if len(mapping) != len(fields):
+            raise ValueError(f"Duplicate field in {fields}")
+        mappings.append(mapping)
+        x += len(fields)
+    return mappings
+
 # ==== Lấy dữ liệu chính của cầu thủ (tối thiểu 90 phút) ====
-def get_main_player_data(driver, url_base, info_fields, columns):
-    soup = get_soup(driver, url_base)
-    table = soup.find('table', {'class': 'min_width sortable stats_table shade_zero now_sortable sticky_table eq2 re2 le2'})
-    body = table.find('tbody')
+def get_main_player_data(pages, url_base, field_map, columns):
+    soup = get_soup(pages, url_base)
+    table = find_player_table(soup)
+    rows = table.find('tbody').find_all('tr')
 
-    players_dict = {}
+    store = PlayerStore(columns, capacity=len(rows))
+    fields = list(field_map)
 
-    for tr in body.find_all('tr'):
+    for tr in rows:
         if 'thead' in tr.get('class', []):
             continue
 
-        minutes = tr.find('td', {'data-stat': 'minutes'}).get_text(strip=True).replace(',', '')
+        cells, player_id = parse_row(tr)
+        minutes = cells['minutes'].get_text(strip=True).replace(',', '')
         if not minutes or int(minutes) < 90:
             continue
 
-        player_th = tr.find('td', {'data-append-csv': True})
-        if not player_th:
+        if not player_id:
             continue
 
-        data = extract_data(tr, info_fields)
-        nation = tr.find('td', {'data-stat': 'nationality'}).find('a').find('span').contents[-1].strip()
-        player_id = player_th['data-append-csv'].strip()
-
-        players_dict[player_id] = [data[0] , nation] + data[2:] + ['N/a'] * (len(columns) - len(data))
+        values = dict(zip(field_map.values(), extract_data(cells, fields)))
+        values[field_map['nationality']] = cells['nationality'].find('a').find('span').contents[-1].strip()
+        store.add(player_id, values)
 
     print(f"Done: {url_base}")
-    return players_dict
+    return store
 
-# ==== Hàm cập nhật dữ liệu từ các bảng phụ ====
-def update_sections(driver, players_dict, sections, start_index):
-    x = start_index
-
-    for url, fields in sections:
-        soup = get_soup(driver, url)
-        table = soup.find('table', {'class': 'min_width sortable stats_table shade_zero now_sortable sticky_table eq2 re2 le2'})
+# ==== Hàm cập nhật dữ liệu từ các bảng phụ (ghép theo id cầu thủ) ====
+def update_sections(pages, store, sections):
+    for url, field_map in sections:
+        soup = get_soup(pages, url)
+        table = find_player_table(soup)
         body = table.find('tbody')
+        fields = list(field_map)
 
         for tr in body.find_all('tr'):
-            player_th = tr.find('td', {'data-append-csv': True})
-            if not player_th:
-                continue
-
-            player_id = player_th['data-append-csv'].strip()
-            if player_id not in players_dict:
+            cells, player_id = parse_row(tr)
+            if not player_id or player_id not in store:
                 continue
 
-            stats = extract_data(tr, fields)
-            players_dict[player_id][x:x + len(fields)] = stats
+            store.update(player_id, dict(zip(field_map.values(), extract_data(cells, fields))))
 
-        x += len(fields)
         print(f"Done: {url}")
 
-    return players_dict
+    return store
 
 # ==== Hàm xuất DataFrame ra file CSV ==== 
-def export_to_csv(players_dict, columns, filename):
-    players_sorted = sorted(players_dict.values(), key=lambda x: x[0])
-    multi_cols = pd.MultiIndex.from_tuples(columns)
-    df = pd.DataFrame(players_sorted, columns=multi_cols)
-    df.replace(['', None], 'N/a', inplace=True)
-    df.fillna('N/a', inplace=True)
+def export_to_csv(store, filename):
+    df = store.to_frame()
+    df = df.sort_values(by=df.columns[0], kind='stable')
+
+    # Giữ định dạng cũ của file CSV: mọi cột ghi đúng như fbref ('0.10', '100.0', '2,430'), thiếu = 'N/a'
+    df = format_csv_columns(df, text_columns=[col[-1] for col in COLUMNS])
+
     file_path = os.path.join(BASE_DIR, filename)  # Lưu vào thư mục REPORT_BTL/BTL1_File
     df.to_csv(file_path, index=False, encoding='utf-8-sig')
     print(f"Successfully exported to {file_path} file")
 
+# ==== Hàm xuất file Parquet có kiểu (giá trị thiếu là null, số là float) ====
+def export_to_parquet(store, filename):
+    df = store.to_frame()
+    df = df.sort_values(by=df.columns[0], kind='stable')
+    file_path = os.path.join(BASE_DIR, filename)
+    write_parquet(df, file_path)
+    print(f"Successfully exported to {file_path} file")
+
+
+# ==== Manifest lần crawl trước: dấu vân tay từng bảng và các bảng đã thay đổi ====
+def load_manifest(manifest_name):
+    path = os.path.join(BASE_DIR, manifest_name)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest_name, fingerprints, changed, snapshot):
+    path = os.path.join(BASE_DIR, manifest_name)
+    manifest = {
+        'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'snapshot': snapshot,
+        'fingerprints': fingerprints,
+        'changed_sections': changed,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Changed sections: {', '.join(changed) if changed else 'none'}")
+
+# ==== Bảng của lần crawl trước (None nếu chưa có hoặc thiếu manifest) ====
+def load_previous_snapshot(manifest):
+    if not manifest:
+        return None
+    path = os.path.join(BASE_DIR, manifest['snapshot'])
+    if not os.path.exists(path):
+        return None
+    return PlayerStore.from_frame(read_table(path), COLUMNS)
+
+# ==== Cập nhật tăng dần: chỉ parse lại các bảng đã thay đổi ====
+def build_incremental(pages, url_base, info_map, sections, changed, previous):
+    """
+    `sections` là list (key, url, field_map). Nếu bảng chính không đổi thì dùng lại bảng cũ,
+    ngược lại parse lại bảng chính rồi chép các bảng phụ không đổi từ bảng cũ theo id cầu thủ.
+    Bảng phụ không đổi vẫn được parse lại nếu có cầu thủ mới chưa có trong bảng cũ.
+    """
+    if 'stats' in changed:
+        store = get_main_player_data(pages, url_base, info_map, COLUMNS)
+    else:
+        store = previous
+
+    for key, url, field_map in sections:
+        if key not in changed:
+            if store is previous:
+                continue
+            missing = store.copy_columns(previous, field_map.values())
+            if not missing:
+                continue
+        update_sections(pages, store, [(url, field_map)])
+    return store
+
 
 # ==== Main chương trình ====
-def main():
-    driver = init_driver()
-
-    # ==== URL và cấu hình ==== 
-    url_base = 'https://fbref.com/en/comps/9/stats/Premier-League-Stats'
-    info_fields = [
-        'player', 'nationality', 'team', 'position', 'age',
-        'games', 'games_starts', 'minutes', 'goals', 'assists',
-        'cards_yellow', 'cards_red', 'xg', 'xg_assist',
-        'progressive_carries', 'progressive_passes', 'progressive_passes_received',
-        'goals_per90', 'assists_per90', 'xg_per90', 'xg_assist_per90'
-    ]
-
-    sections = [
-        ('https://fbref.com/en/comps/9/keepers/Premier-League-Stats', 
-        ['gk_goals_against_per90', 'gk_save_pct', 'gk_clean_sheets_pct', 'gk_pens_save_pct']),
-        ('https://fbref.com/en/comps/9/shooting/Premier-League-Stats', 
-        ['shots_on_target_pct', 'shots_on_target_per90', 'goals_per_shot', 'average_shot_distance']),
-        ('https://fbref.com/en/comps/9/passing/Premier-League-Stats', 
-        ['passes_completed', 'passes_pct', 'passes_total_distance',
-        'passes_pct_short', 'passes_pct_medium', 'passes_pct_long',
-        'assisted_shots', 'passes_into_final_third', 'passes_into_penalty_area',
-        'crosses_into_penalty_area', 'progressive_passes']),
-        ('https://fbref.com/en/comps/9/gca/Premier-League-Stats', 
-        ['sca', 'sca_per90', 'gca', 'gca_per90']),
-        ('https://fbref.com/en/comps/9/defense/Premier-League-Stats', 
-        ['tackles', 'tackles_won', 'challenges', 'challenges_lost',
-         'blocks', 'blocked_shots', 'blocked_passes', 'interceptions']),
-        ('https://fbref.com/en/comps/9/possession/Premier-League-Stats', 
-        ['touches', 'touches_def_pen_area', 'touches_def_3rd', 'touches_mid_3rd',
-        'touches_att_3rd', 'touches_att_pen_area', 'take_ons', 'take_ons_won',
-        'take_ons_tackled', 'carries', 'carries_progressive_distance',
-        'progressive_carries', 'carries_into_final_third', 'carries_into_penalty_area',
-        'miscontrols', 'dispossessed', 'passes_received', 'progressive_passes_received']),
-        ('https://fbref.com/en/comps/9/misc/Premier-League-Stats', 
-        ['fouls', 'fouled', 'offsides', 'crosses',
-         'ball_recoveries', 'aerials_won', 'aerials_lost', 'aerials_won_pct']),
-    ]
-
-    # ==== Cột MultiIndex ====
-    columns = [
-    ('','' ,'Name'),
-    ('', '','Nation' ),
-    ('', '', 'Team'),
-    ('', '', 'Position' ),
-    ('', '', 'Age'),
-    ('', 'Playing Time', 'Matches played'),
-    ('', '', 'Starts'),
-    ('', '', 'Minutes'),
-    ('', 'Performance', 'Goals'),
-    ('', '', 'Assists'),
-    ('', '', 'Yellow Cards'),
-    ('', '', 'Red Cards'),
-    ('', 'Expected', 'xG'),
-    ('', '', 'xAG'),
-    ('', 'Progression', 'Prg Carries'),
-    ('', '', 'Prg Passes'),
-    ('', '', 'Prg Passes Rec'),
-    ('', 'Per 90 Minutes', 'Goals/90'),
-    ('', '', 'Assists/90'),
-    ('', '', 'xG/90'),
-    ('', '', 'xGA/90'),
-    ('Goalkeeping', 'Performance', 'GA90'),
-    ('', '', 'Save%'),
-    ('', '', 'CS%'),
-    ('', 'Penalty Kicks', 'PK_Save%'),
-    ('Shooting','Standard', 'SoT%'),
-    ('','','Sot/90'),
-    ('','', 'G/sh'),
-    ('','', 'Shoot_Dist'),
-    ('Passing','Total', 'Passes Completed (Cmp)'),
-    ('','', 'Cmp%'),
-    ('','', 'Total Dist'),
-    ('','Short', 'Short_Cmp%'),
-    ('','Medium', 'Medium_Cmp%'),
-    ('','Long', 'Long_Cmp%'),
-    ('','Expected', 'Key Passes'),
-    ('','', 'Pass 1/3'),
-    ('','', 'Pass PA'),
-    ('','', 'Cross PA'),
-    ('','', 'Prg Passes (Pass)'),
-    ('Goal and Shot Creation','SCA', 'Shot-Creating Actions (SCA)'),
-    ('','', 'SCA90'),
-    ('','GCA', 'Goal-Creating Actions (GCA)'),
-    ('','', 'GCA90'),
-    ('Defensive','Tackles', 'Tkl'),
-    ('','', 'Tkl Won'),
-    ('','Challenges', 'Dribbles Challenged (Att)'),
-    ('','', 'Challenges Lost'),
-    ('','Blocks', 'Blocks'),
-    ('','', 'Shots Blocked'),
-    ('','', 'Pass Blocked'),
-    ('','', 'Interceptions'),
-    ('Possession','Touches', 'Touches'),
-    ('','', 'Def_Pen'),
-    ('','', 'Def_3rd'),
-    ('','', 'Mid_3rd'),
-    ('','', 'Att_3rd'),
-    ('','', 'Att_Pen'),
-    ('','Take-Ons', 'Attempted'),
-    ('','', 'Successful %'),
-    ('','', 'Tkld%'),
-    ('','Carries', 'Carries'),
-    ('','', 'PrgDist'),
-    ('','', 'PrgC (Poss)'),
-    ('','', 'Carries_1/3'),
-    ('','', 'Carries_CPA'),
-    ('','', 'Miscontrols'),
-    ('','', 'Dispossessed'),
-    ('','Receiving', 'Passes Rec'),
-    ('','', 'Prg Rec (Poss)'),
-    (' Miscellaneous','Performance', 'Fouls Committed'),
-    ('','', 'Fouls Drawn'),
-    ('','', 'Offsides'),
-    ('','', 'Crosses'),
-    ('','', 'Recov'),
-    ('','Aerial Duels', 'Aerials Won'),
-    ('','', 'Aerials Lost'),
-    ('','', 'Aerials Won%')
-    ]
+def parse_args():
+    parser = argparse.ArgumentParser(description='Crawl player stats from fbref')
+    parser.add_argument('--host', default=FBREF_HOST, help='Host to crawl (e.g. a local server with saved fbref pages)')
+    parser.add_argument('--workers', type=int, default=8, help='Number of concurrent downloads')
+    parser.add_argument('--min-interval', type=float, default=0.5, help='Minimum seconds between two requests to the same host')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Directory of the on-disk page cache')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL, help='Seconds a cached page is reused without revalidation')
+    parser.add_argument('--no-cache', action='store_true', help='Always download pages, ignore the cache')
+    parser.add_argument('--offline', action='store_true', help='Serve every page from the cache, no network access')
+    parser.add_argument('--incremental', action='store_true', help='Only re-parse stat tables that changed since the last run')
+    parser.add_argument('--competitions', nargs='+', choices=sorted(COMPETITIONS), help='Competitions to scrape into shards')
+    parser.add_argument('--seasons', nargs='+', help="Seasons to scrape into shards, e.g. 2023-2024 (default: current)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Worker processes for sharded scraping')
+    return parser.parse_args()
+
+# ==== URL các trang của một giải đấu, một mùa giải (None = mùa hiện tại) ====
+def competition_urls(host, competition, season=None):
+    comp_id, slug = COMPETITIONS[competition]
+
+    def page_url(page):
+        if season and season != 'current':
+            return f'{host}/en/comps/{comp_id}/{season}/{page}/{season}-{slug}-Stats'
+        return f'{host}/en/comps/{comp_id}/{page}/{slug}-Stats'
+
+    return page_url('stats'), [(page_url(page), fields) for page, fields in SECTIONS]
+
+# ==== Crawl một giải đấu/mùa giải và ghi kết quả ====
+def scrape_competition(args, competition, season, output_name, manifest_name, write_csv=True):
+    """
+    Tải, parse (đầy đủ hoặc tăng dần) và ghi `<output_name>.parquet` (kèm file CSV nếu `write_csv`).
+    Trả về thông tin của bảng để ghi vào file index.
+    """
+    host = args.host.rstrip('/')
+    url_base, sections = competition_urls(host, competition, season)
+
+    # ==== Tải song song toàn bộ các trang ====
+    urls = [url_base] + [url for url, _ in sections]
+    cache = None if args.no_cache else PageCache(args.cache_dir, ttl=args.cache_ttl)
+    pages = fetch_pages(urls, max_workers=args.workers, min_interval=args.min_interval,
+                        validate=has_player_table, cache=cache, offline=args.offline)
+    if cache is not None and not args.offline:
+        cache.evict()
+
+    # ==== So sánh dấu vân tay với lần crawl trước ====
+    info_map, *section_maps = map_section_fields(COLUMNS, INFO_FIELDS, sections)
+    keys = ['stats'] + [page for page, _ in SECTIONS]
+    fingerprints = {key: fingerprint_page(pages[url], field_map)
+                    for key, url, field_map in zip(keys, urls, [info_map] + section_maps)}
+    manifest = load_manifest(manifest_name)
+    previous = load_previous_snapshot(manifest) if args.incremental else None
+    if previous is None:
+        changed = keys
+    else:
+        changed = [key for key in keys if manifest['fingerprints'].get(key) != fingerprints[key]]
 
     # ==== Lấy dữ liệu ====
-    players_dict = get_main_player_data(driver, url_base, info_fields, columns)
-    players_dict = update_sections(driver, players_dict, sections, len(info_fields))
-    export_to_csv(players_dict, columns, 'Table_EPL.csv')
+    if previous is None:
+        store = get_main_player_data(pages, url_base, info_map, COLUMNS)
+        store = update_sections(pages, store, [(url, field_map) for (url, _), field_map in zip(sections, section_maps)])
+    else:
+        section_keys = [(key, url, field_map) for key, (url, _), field_map in zip(keys[1:], sections, section_maps)]
+        store = build_incremental(pages, url_base, info_map, section_keys, changed, previous)
+
+    if write_csv:
+        export_to_csv(store, output_name + '.csv')
+    export_to_parquet(store, output_name + '.parquet')
+    save_manifest(manifest_name, fingerprints, changed, output_name + '.parquet')
+
+    return {
+        'competition': competition,
+        'season': season or 'current',
+        'path': os.path.basename(output_name) + '.parquet',
+        'players': len(store),
+        'changed_sections': changed,
+    }
+
+# ==== Một tiến trình con: crawl một shard (giải đấu, mùa giải) ====
+def scrape_shard(job):
+    args, competition, season = job
+    name = f"{competition}_{season or 'current'}"
+    output_name = os.path.join(SHARD_DIR, name)
+    return scrape_competition(args, competition, season, output_name, output_name + '.manifest.json', write_csv=False)
+
+# ==== Ghi file index của các shard (gộp với index cũ) ====
+def write_shard_index(entries):
+    path = os.path.join(BASE_DIR, SHARD_DIR, SHARD_INDEX)
+    shards = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for entry in json.load(f)['shards']:
+                shards[(entry['competition'], entry['season'])] = entry
+
+    updated_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    for entry in entries:
+        shards[(entry['competition'], entry['season'])] = dict(entry, updated_at=updated_at)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'shards': sorted(shards.values(), key=lambda e: (e['competition'], e['season']))}, f, indent=2)
+    print(f"Successfully wrote shard index {path}")
+
+def main():
+    args = parse_args()
+    try:
+        scrape(args)
+    except CacheMiss as error:
+        raise SystemExit(f"BTL_1.py: error: page not in cache: {error.url} (run without --offline to download it)")
+
+def scrape(args):
+    # Mặc định: Premier League mùa hiện tại, ghi Table_EPL.csv/.parquet như trước
+    if not args.competitions and not args.seasons:
+        scrape_competition(args, 'EPL', None, 'Table_EPL', MANIFEST_FILE)
+        return
+
+    # Nhiều giải đấu/mùa giải: mỗi shard chạy trong một tiến trình riêng
+    os.makedirs(os.path.join(BASE_DIR, SHARD_DIR), exist_ok=True)
+    jobs = [(args, competition, season)
+            for competition in (args.competitions or ['EPL'])
+            for season in (args.seasons or [None])]
+    processes = max(1, min(args.processes, len(jobs)))
 
-    driver.quit()
+    # Mọi tiến trình cùng gọi một host: chia đều giới hạn tốc độ cho từng tiến trình
+    args.min_interval *= processes
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        entries = list(pool.map(scrape_shard, jobs))
+    write_shard_index(entries)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,221 +1,411 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import time
+_IMPORT_START = time.perf_counter()
+
 import pandas as pd
+import numpy as np
+import argparse
+import json
 import os
 import math
+from concurrent.futures import ProcessPoolExecutor
+
+from loader import load_table
+from table_schema import resolve_table_path
+
+# matplotlib chỉ được import khi thật sự vẽ (trong render_histogram)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 # ========== Thiết lập thư mục lưu kết quả ==========
 BASE_DIR = os.path.join('REPORT_BTL', 'BTL2_File')  # Thay đổi đường dẫn đến thư mục mong muốn
-os.makedirs(BASE_DIR, exist_ok=True)
 
 # ========== Đọc và xử lý dữ liệu từ file CSV ==========
-def read_and_process_data(file_path):
-    df = pd.read_csv(file_path, header=2)
-    df.replace('N/a', pd.NA, inplace=True)
-
-    cols_to_exclude = ['Name', 'Age', 'Team', 'Nation', 'Position']
-    cols_to_convert = [col for col in df.columns if col not in cols_to_exclude]
-
-    for col in cols_to_convert:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+def read_and_process_data(file_path, competitions=None, seasons=None):
+    # Báo cáo thống kê ghi 8 chữ số thập phân nên giữ float64
+    return load_table(file_path, competitions, seasons, stat_dtype='float64')
+
+# ========== Chỉ số hàng của k giá trị lớn nhất trong từng cột ==========
+def top_k_rows(X, k):
+    """
+    X: ma trận (số cầu thủ x số chỉ số), NaN đã thay bằng -inf.
+    Trả về ma trận (số chỉ số x k) chỉ số hàng, giá trị giảm dần; khi bằng nhau
+    thì ưu tiên hàng đứng trước (giống nlargest(keep='first')).
+    """
+    # Ngưỡng: giá trị lớn thứ k của mỗi cột
+    threshold = -np.partition(-X, k - 1, axis=0)[k - 1]
+
+    # Lấy mọi giá trị lớn hơn ngưỡng, phần còn thiếu lấy các giá trị bằng ngưỡng theo thứ tự hàng
+    above = X > threshold
+    ties = X == threshold
+    needed = k - above.sum(axis=0)
+    selected = above | (ties & (np.cumsum(ties, axis=0) <= needed))
+
+    rows = np.nonzero(selected.T)[1].reshape(X.shape[1], k)
+    values = np.take_along_axis(X.T, rows, axis=1)
+    order = np.lexsort((rows, -values), axis=1)
+    return np.take_along_axis(rows, order, axis=1)
+
+# ========== Tính toán Top k và Bottom k ==========
+def get_top_and_bottom_k(df, k=3, team=None, position=None):
+    if team is not None:
+        df = df[df['Team'] == team]
+    if position is not None:
+        df = df[df['Position'].astype(str).str.contains(position, regex=False)]
 
-    df['Minutes'] = df['Minutes'].replace({',': ''}, regex=True)
-    df['Minutes'] = pd.to_numeric(df['Minutes'], errors='coerce')
-    return df
-
-# ========== Tính toán Top 3 và Bottom 3 ==========
-def get_top_and_bottom_3(df):
     numeric_df = df.select_dtypes(include=['float64', 'int64'])
-    rows = []
-
-    for col in numeric_df.columns:
-        if numeric_df[col].nunique() < 3:
-            continue
-
-        # Top 3
-        for i, idx in enumerate(numeric_df[col].nlargest(3).index, 1):
-            name = df.loc[idx, 'Name']
-            value = df.loc[idx, col]
-            rows.append((col, f'Top {i}', name, value))
-
-        # Bottom 3
-        for i, idx in enumerate(numeric_df[col].nsmallest(3).index, 1):
-            name = df.loc[idx, 'Name']
-            value = df.loc[idx, col]
-            rows.append((col, f'Bot {i}', name, value))
-
-    result_df = pd.DataFrame(rows, columns=['Name_col', 'Rank', 'Player Name', 'Value'])
+    numeric_df = numeric_df.loc[:, numeric_df.nunique() >= k]
+    columns = numeric_df.columns.to_numpy()
+    if len(columns) == 0 or len(numeric_df) < k:
+        return pd.DataFrame(columns=['Name_col', 'Rank', 'Player Name', 'Value'])
+
+    X = numeric_df.to_numpy(dtype='float64')
+    top = top_k_rows(np.where(np.isnan(X), -np.inf, X), k)
+    bot = top_k_rows(np.where(np.isnan(X), -np.inf, -X), k)
+    rows = np.hstack([top, bot])  # (số chỉ số x 2k)
+
+    names = df['Name'].to_numpy()
+    ranks = [f'Top {i}' for i in range(1, k + 1)] + [f'Bot {i}' for i in range(1, k + 1)]
+    result_df = pd.DataFrame({
+        'Name_col': np.repeat(columns, 2 * k),
+        'Rank': np.tile(ranks, len(columns)),
+        'Player Name': names[rows].ravel(),
+        'Value': np.take_along_axis(X.T, rows, axis=1).ravel(),
+    })
     return result_df
 
-# ========== Lưu kết quả Top 3 và Bottom 3 ==========
-def save_top_bottom_3(result_df):
+# ========== Lưu kết quả Top k và Bottom k ==========
+def save_top_bottom_3(result_df, filename='top_3.txt'):
     folder = os.path.join(BASE_DIR, 'Top_Bottom')
     os.makedirs(folder, exist_ok=True)
-    filepath = os.path.join(folder, 'top_3.txt')
+    filepath = os.path.join(folder, filename)
 
     with open(filepath, 'w', encoding='utf-8') as f:
-        for stat in result_df['Name_col'].unique():
+        for _, stat_df in result_df.groupby('Name_col', sort=False):
             f.write(f"\n==============\n")
-            stat_df = result_df[result_df['Name_col'] == stat]
             f.write(stat_df.to_string(index=False))
             f.write('\n')
-    print(f"✅ Saved Top/Bottom 3 to {filepath}")
+    print(f"✅ Saved Top/Bottom to {filepath}")
+
+# ========== Định dạng số: thiếu -> 'N/a', số nguyên -> int, còn lại làm tròn 8 chữ số ==========
+def smart_format(values):
+    arr = values.to_numpy(dtype='float64')
+    missing = np.isnan(arr)
+    whole = ~missing & (arr == np.floor(arr))
+
+    out = np.round(arr, 8).astype(object)
+    out[whole] = arr[whole].astype(np.int64)
+    out[missing] = 'N/a'
+    return pd.DataFrame(out, index=values.index, columns=values.columns).infer_objects().copy()
 
 # ========== Tính toán Mean, Median, Std theo đội và toàn giải ==========
 def calculate_statistics(df):
     folder = os.path.join(BASE_DIR, 'Statistics')
     os.makedirs(folder, exist_ok=True)
 
-    def smart_float(val):
-        if pd.isna(val):
-            return 'N/a'
-        return int(val) if val == int(val) else round(val, 8)
-
     numeric_df = df.select_dtypes(include=['float64', 'int64'])
-    teams = sorted(df['Team'].unique(), key=lambda x: x[0])
-
-    results = []
-
-    # Toàn giải
-    row = {'Team': 'All'}
-    for col in numeric_df.columns:
-        row[f'Mean of {col}'] = smart_float(df[col].mean())
-        row[f'Median of {col}'] = smart_float(df[col].median())
-        row[f'Std of {col}'] = smart_float(df[col].std())
-    results.append(row)
-
-    # Theo đội
-    for team in teams:
-        team_df = df[df['Team'] == team]
-        row = {'Team': team}
-        for col in numeric_df.columns:
-            row[f'Mean of {col}'] = smart_float(team_df[col].mean())
-            row[f'Median of {col}'] = smart_float(team_df[col].median())
-            row[f'Std of {col}'] = smart_float(team_df[col].std())
-        results.append(row)
-
-    results_df = pd.DataFrame(results)
-    ordered_columns = ['Team'] + [f'{stat} of {col}' for col in numeric_df.columns for stat in ['Mean', 'Median', 'Std']]
-    results_df = results_df[ordered_columns]
+    teams = sorted(df['Team'].dropna().unique(), key=lambda x: x[0])
+    aggs = ['mean', 'median', 'std']
+
+    # Một lần groupby cho mọi đội, một lần agg cho toàn giải
+    by_team = numeric_df.groupby(df['Team'], sort=False, observed=True).agg(aggs)
+    overall = numeric_df.agg(aggs).unstack().to_frame('All').T
+    stats = pd.concat([overall, by_team.reindex(teams)])[by_team.columns]
+
+    stats.columns = [f'{stat.capitalize()} of {col}' for col, stat in stats.columns]
+    results_df = smart_format(stats)
+    results_df.index.name = 'Team'
+    results_df = results_df.reset_index()
 
     filepath = os.path.join(folder, 'result_statistics.csv')
     results_df.to_csv(filepath, index=False)
     print(f"✅ Saved statistics to {filepath}")
 
-# ========== Vẽ và lưu biểu đồ Histogram ==========
-def plot_histograms(df, attack_stats, defense_stats):
+# ========== Histogram + KDE của một mảng giá trị ==========
+def compute_histogram(values, bins, grid_size=200):
+    """
+    Trả về dict gồm biên các bin, số lượng mỗi bin và đường KDE (Gaussian, băng thông Scott)
+    đã nhân với số mẫu * độ rộng bin để vẽ cùng thang với histogram.
+    """
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return {'n': 0, 'edges': [], 'counts': [], 'kde_x': [], 'kde_y': []}
+
+    counts, edges = np.histogram(values, bins=bins)
+    kde_x, kde_y = np.array([]), np.array([])
+    std = values.std(ddof=1) if len(values) > 1 else 0.0
+    if std > 0:
+        bandwidth = std * len(values) ** (-1 / 5)
+        kde_x = np.linspace(values.min(), values.max(), grid_size)
+        z = (kde_x[:, None] - values[None, :]) / bandwidth
+        density = np.exp(-0.5 * z ** 2).sum(axis=1) / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+        kde_y = density * len(values) * (edges[1] - edges[0])
+
+    return {
+        'n': int(len(values)),
+        'edges': np.round(edges, 6).tolist(),
+        'counts': counts.tolist(),
+        'kde_x': np.round(kde_x, 6).tolist(),
+        'kde_y': np.round(kde_y, 6).tolist(),
+    }
+
+# ========== Tính dữ liệu histogram cho mọi cặp (chỉ số, đội) ==========
+def build_histogram_data(df, stats, bins_all=30, bins_team=20):
+    """
+    Kết quả: {chỉ số: {'All': histogram toàn giải, 'teams': {đội: histogram}}}.
+    Dữ liệu được chia theo đội đúng một lần và dùng lại cho mọi chỉ số.
+    """
+    team_frames = {team: frame for team, frame in df.groupby('Team', sort=False, observed=True)}
+    data = {}
+    for stat in stats:
+        data[stat] = {
+            'All': compute_histogram(df[stat].to_numpy(dtype='float64'), bins_all),
+            'teams': {str(team): compute_histogram(frame[stat].to_numpy(dtype='float64'), bins_team)
+                      for team, frame in team_frames.items()},
+        }
+    return data
+
+# ========== Lưu dữ liệu histogram ra JSON cho dashboard ==========
+def save_histogram_data(data, filepath):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"✅ Saved histogram data to {filepath}")
+
+# ========== Vẽ histogram đã tính sẵn lên một trục ==========
+def draw_histogram(ax, hist, color):
+    if hist['n'] == 0:
+        return
+    edges = np.asarray(hist['edges'])
+    ax.bar(edges[:-1], hist['counts'], width=np.diff(edges), align='edge',
+           color=color, alpha=0.6, edgecolor='black', linewidth=0.8)
+    if hist['kde_x']:
+        ax.plot(hist['kde_x'], hist['kde_y'], color=color, linewidth=1.5)
+
+# ========== Vẽ một biểu đồ (chạy trong tiến trình con) ==========
+def render_histogram(task):
+    import matplotlib
+    matplotlib.use('Agg')  # Chỉ lưu ảnh, không cần cửa sổ hiển thị
+    import matplotlib.pyplot as plt
+
+    kind, path, title, stat, color, data = task
+    plt.style.use('seaborn-v0_8-whitegrid')
+
+    if kind == 'all':
+        fig, ax = plt.subplots(figsize=(10, 6))
+        draw_histogram(ax, data, color)
+        ax.set_title(title)
+        ax.set_xlabel(stat)
+        ax.set_ylabel('Frequency')
+        fig.tight_layout()
+    else:
+        # data: dict {đội: histogram}
+        cols = 5 # số cột subplot
+        rows = math.ceil(len(data) / cols)
+
+        fig, axes = plt.subplots(rows, cols, figsize=(5 * cols, 4 * rows), constrained_layout=True)
+        axes = axes.flatten()
+
+        for ax, (team, hist) in zip(axes, data.items()):
+            draw_histogram(ax, hist, color)
+            ax.set_title(team)
+            ax.set_xlabel(stat)
+            ax.set_ylabel('Frequency')
+
+        # Ẩn các subplot còn dư
+        for j in range(len(data), len(axes)):
+            axes[j].set_visible(False)
+
+        fig.suptitle(title, fontsize=16)
+
+    fig.savefig(path)
+    plt.close('all')
+    return path
+
+# ========== Tên file an toàn cho tên chỉ số (ví dụ 'Pass 1/3') ==========
+def safe_filename(stat):
+    return stat.replace('/', '_').replace(' ', '_')
+
+# ========== Các biểu đồ của một nhóm chỉ số, lấy từ dữ liệu đã tính ==========
+def build_histogram_tasks(hist_data, stats, folder, title, prefix, team_title, team_prefix, color):
+    tasks = []
+    for stat in stats:
+        tasks.append(('all', os.path.join(folder, f"{prefix}_{safe_filename(stat)}.png"),
+                      f'{title} of {stat}', stat, color, hist_data[stat]['All']))
+        tasks.append(('teams', os.path.join(folder, f"{team_prefix}_teams_grid_{safe_filename(stat)}.png"),
+                      f'{team_title} - {stat}', stat, color, hist_data[stat]['teams']))
+    return tasks
+
+# ========== Tính, lưu dữ liệu và (tuỳ chọn) vẽ Histogram ==========
+def plot_histograms(df, attack_stats, defense_stats, extra_stats=None, workers=None, render=True):
     folder = os.path.join(BASE_DIR, 'Histograms')
     os.makedirs(folder, exist_ok=True)
-    plt.style.use('seaborn-v0_8-whitegrid')
 
-    def plot_his(data, stats, title, prefix, check):
-        for stat in stats:
-            plt.figure(figsize=(10, 6))
-            if check:
-                sns.histplot(data[stat].dropna(), bins=30, kde=True , color='skyblue')
-            else:
-                sns.histplot(data[stat].dropna(), bins=30, kde=True , color='red')      
-            plt.title(f'{title} of {stat}')
-            plt.xlabel(stat)
-            plt.ylabel('Frequency')
-            plt.tight_layout()
-            filename = f"{prefix}_{stat}.png"
-            plt.savefig(os.path.join(folder, filename))
-            plt.close()
-
-    def plot_stat_per_team_subplots(df, stats, title_prefix, prefix, check):
-        for stat in stats:
-            teams = df['Team'].dropna().unique()
-            num_teams = len(teams)
-            cols = 5 # số cột subplot
-            rows = math.ceil(num_teams / cols)
-
-            fig, axes = plt.subplots(rows, cols, figsize=(5 * cols, 4 * rows), constrained_layout=True)
-            axes = axes.flatten()
-
-            for i, team in enumerate(teams):
-                ax = axes[i]
-                team_data = df[df['Team'] == team][stat].dropna()
-                if check:  sns.histplot(team_data, bins=20, kde=True, color='skyblue', ax=ax)
-                else: sns.histplot(team_data, bins=20, kde=True, color='red', ax=ax)
-                ax.set_title(team)
-                ax.set_xlabel(stat)
-                ax.set_ylabel('Frequency')
-
-            # Ẩn các subplot còn dư
-            for j in range(len(teams), len(axes)):
-                axes[j].set_visible(False)
-
-            fig.suptitle(f'{title_prefix} - {stat}', fontsize=16)
-            filename = f"{prefix}_teams_grid_{stat}.png"
-            plt.savefig(os.path.join(folder, filename))
-            plt.close()
-
-    # Plot tổng cho tất cả cầu thủ
-    plot_his(df, attack_stats, 'Attack Stats for All Players', 'All_Att', True)
-    plot_his(df, defense_stats, 'Defense Stats for All Players', 'All_Def', False)
-
-    # Plot gộp tất cả đội vào 1 ảnh cho mỗi chỉ số
-    plot_stat_per_team_subplots(df, attack_stats, 'Attack Stats per Team', 'All_Teams_Attack', True)
-    plot_stat_per_team_subplots(df, defense_stats, 'Defense Stats per Team', 'All_Teams_Defense', False)
-
-    print(f"✅ Saved histograms to {folder}")
+    extra_stats = extra_stats or []
+    all_stats = list(dict.fromkeys(attack_stats + defense_stats + extra_stats))
+    hist_data = build_histogram_data(df, all_stats)
+    save_histogram_data(hist_data, os.path.join(folder, 'histogram_data.json'))
+    if not render:
+        return
+
+    tasks = []
+    # Plot tổng cho tất cả cầu thủ và plot gộp tất cả đội vào 1 ảnh cho mỗi chỉ số
+    tasks += build_histogram_tasks(hist_data, attack_stats, folder, 'Attack Stats for All Players', 'All_Att',
+                                   'Attack Stats per Team', 'All_Teams_Attack', 'skyblue')
+    tasks += build_histogram_tasks(hist_data, defense_stats, folder, 'Defense Stats for All Players', 'All_Def',
+                                   'Defense Stats per Team', 'All_Teams_Defense', 'red')
+    tasks += build_histogram_tasks(hist_data, extra_stats, folder, 'Stats for All Players', 'All_Stat',
+                                   'Stats per Team', 'All_Teams_Stat', 'skyblue')
+
+    # Vẽ song song trên nhiều tiến trình
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(render_histogram, tasks))
+
+    print(f"✅ Saved {len(tasks)} histograms to {folder}")
+
+# ========== Các chỉ số càng thấp càng tốt ==========
+LOWER_IS_BETTER = [
+    'GA90', 'Yellow Cards', 'Red Cards', 'Challenges Lost', 'Miscontrols',
+    'Dispossessed', 'Tkld%', 'Fouls Committed', 'Offsides', 'Aerials Lost',
+]
+
 # ========== Tìm đội bóng tốt nhất ==========
-def find_best_team(df):
+def find_best_team(df, weights=None, lower_is_better=LOWER_IS_BETTER):
+    """
+    Một lần groupby cho ma trận trung bình (đội x chỉ số), xếp hạng mọi chỉ số cùng lúc.
+    Đội dẫn đầu một chỉ số được cộng trọng số của chỉ số đó (mặc định 1);
+    nếu nhiều đội bằng nhau thì tất cả đều được cộng và được ghi vào cột 'Tied Teams'.
+    """
     folder = os.path.join(BASE_DIR, 'THE_BEST_TEAM')
     os.makedirs(folder, exist_ok=True)
 
+    weights = weights or {}
     numeric_df = df.select_dtypes(include=['float64', 'int64'])
-    stat_summary, team_scores = [], {}
-
-    for col in numeric_df.columns:
-        if col not in df.columns or df[col].dropna().empty:
-            continue
-
-        team_means = df.groupby('Team')[col].mean().dropna()
-        if team_means.empty:
-            continue
-
-        top_team = team_means.idxmax()
-        top_score = team_means.loc[top_team]
-
+    team_means = numeric_df.groupby(df['Team'], observed=True).mean().dropna(axis=1, how='all')
+    unknown = [stat for stat in weights if stat not in team_means.columns]
+    if unknown:
+        raise ValueError(f"Unknown stat(s) in --weight: {', '.join(unknown)}")
+
+    # Đổi dấu các chỉ số "càng thấp càng tốt" để mọi cột đều lấy giá trị lớn nhất
+    lower = [col for col in team_means.columns if col in lower_is_better]
+    signed = team_means.copy()
+    signed[lower] = -signed[lower]
+
+    best_signed = signed.max()
+    is_best = signed.eq(best_signed)
+    best_team = signed.idxmax()
+    best_score = team_means.max()
+    best_score[lower] = team_means[lower].min()
+
+    stat_summary = []
+    for col in team_means.columns:
+        tied = sorted(str(team) for team in is_best.index[is_best[col].to_numpy()])
         stat_summary.append({
             'Statistic': col,
-            'Best Team': top_team,
-            'Average Score': round(top_score, 4)
+            'Best Team': best_team[col],
+            'Average Score': round(best_score[col], 4),
+            'Tied Teams': ', '.join(team for team in tied if team != str(best_team[col])),
         })
 
-        team_scores[top_team] = team_scores.get(top_team, 0) + 1
-
-    best_team = max(team_scores.items(), key=lambda x: x[1])[0]
-    top_count = team_scores[best_team]
+    # Điểm của mỗi đội: tổng trọng số các chỉ số mà đội dẫn đầu (kể cả đồng hạng)
+    stat_weights = pd.Series([weights.get(col, 1.0) for col in team_means.columns], index=team_means.columns)
+    team_scores = is_best.mul(stat_weights, axis=1).sum(axis=1)
+    top_count = team_scores.max()
+    winners = sorted(str(team) for team in team_scores.index[team_scores.eq(top_count)])
+    best_team = winners[0]
+    top_count = int(top_count) if top_count == int(top_count) else round(top_count, 4)
 
     stat_summary.append({
         'Statistic': 'The best Team',
         'Best Team': best_team,
-        'Average Score': f'Top in {top_count} statistics'
+        'Average Score': f'Top in {top_count} statistics',
+        'Tied Teams': ', '.join(winners[1:]),
     })
 
     filepath = os.path.join(folder, 'Team_of_the_season.txt')
     pd.DataFrame(stat_summary).to_csv(filepath, index=False, sep='\t')
-    print(f"✅ Best team: {best_team} (Top in {top_count} stats) → saved to {filepath}")
+    tie_note = f" (tied with {', '.join(winners[1:])})" if len(winners) > 1 else ''
+    print(f"✅ Best team: {best_team}{tie_note} (Top in {top_count} stats) → saved to {filepath}")
 
 # ===================== Main =====================
-
-# Đọc và xử lý dữ liệu
-df = read_and_process_data('Table_EPL.csv')
-
-# Top/Bottom 3
-result_df = get_top_and_bottom_3(df)
-save_top_bottom_3(result_df)
-
-# Tính thống kê và lưu
-calculate_statistics(df)
-
-# Vẽ biểu đồ histogram
-attack_stats = ['Goals', 'Assists', 'SoT%']
-defense_stats = ['Tkl', 'Blocks', 'Interceptions']
-plot_histograms(df, attack_stats, defense_stats)
-
-# Tìm đội bóng tốt nhất
-find_best_team(df)
\ No newline at end of file
+STAGES = ['top_bottom', 'stats', 'plots', 'best_team']
+
+# ==== Đọc một trọng số 'STAT=W' của --weight ====
+def parse_weight(item):
+    stat, sep, weight = item.rpartition('=')
+    try:
+        if not sep or not stat:
+            raise ValueError
+        return stat, float(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected STAT=W with a number W, got '{item}'")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Statistics, rankings and histograms of player stats')
+    parser.add_argument('--input', default=resolve_table_path('Table_EPL.csv'), help='Table_EPL.csv/.parquet or a shard index.json')
+    parser.add_argument('--competitions', nargs='+', help='Shards to load (with a shard index)')
+    parser.add_argument('--seasons', nargs='+', help='Seasons to load (with a shard index)')
+
+    # Chọn các bước cần chạy (không chọn gì = chạy tất cả)
+    parser.add_argument('--top-bottom', dest='stages', action='append_const', const='top_bottom', help='Top/bottom-k players per stat')
+    parser.add_argument('--stats', dest='stages', action='append_const', const='stats', help='Mean/median/std per team')
+    parser.add_argument('--plots', dest='stages', action='append_const', const='plots', help='Histogram data and figures')
+    parser.add_argument('--best-team', dest='stages', action='append_const', const='best_team', help='Best team ranking')
+
+    parser.add_argument('--k', type=int, default=3, help='Number of top/bottom players per stat')
+    parser.add_argument('--team', help='Restrict the top/bottom ranking to one team')
+    parser.add_argument('--position', help="Restrict the top/bottom ranking to a position (e.g. 'FW')")
+    parser.add_argument('--plot-stats', nargs='+', help="Extra metrics to plot histograms for ('all' = every numeric column)")
+    parser.add_argument('--workers', type=int, default=None, help='Processes used to render histograms')
+    parser.add_argument('--no-render', action='store_true', help='Only export histogram data, skip the PNG files')
+    parser.add_argument('--weight', action='append', default=[], type=parse_weight, metavar='STAT=W', help='Weight of a stat in the best-team ranking (repeatable)')
+    parser.add_argument('--timings', action='store_true', help='Print import and per-stage timings')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = args.stages or STAGES
+    timings = {'import': IMPORT_SECONDS}
+
+    # Đọc và xử lý dữ liệu
+    start = time.perf_counter()
+    df = read_and_process_data(args.input, args.competitions, args.seasons)
+    timings['load'] = time.perf_counter() - start
+
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        start = time.perf_counter()
+
+        if stage == 'top_bottom':
+            # Top/Bottom k
+            result_df = get_top_and_bottom_k(df, args.k, args.team, args.position)
+            save_top_bottom_3(result_df, f'top_{args.k}.txt')
+
+        elif stage == 'stats':
+            # Tính thống kê và lưu
+            calculate_statistics(df)
+
+        elif stage == 'plots':
+            # Vẽ biểu đồ histogram
+            attack_stats = ['Goals', 'Assists', 'SoT%']
+            defense_stats = ['Tkl', 'Blocks', 'Interceptions']
+            extra_stats = args.plot_stats or []
+            if extra_stats == ['all']:
+                extra_stats = list(df.select_dtypes(include='number').columns)
+            # Các chỉ số tấn công/phòng ngự đã được vẽ riêng, không vẽ lại dưới tên All_Stat_*
+            extra_stats = [stat for stat in extra_stats if stat not in attack_stats + defense_stats]
+            plot_histograms(df, attack_stats, defense_stats, extra_stats, args.workers, render=not args.no_render)
+
+        elif stage == 'best_team':
+            # Tìm đội bóng tốt nhất
+            try:
+                find_best_team(df, dict(args.weight))
+            except ValueError as error:
+                raise SystemExit(f"BTL_2.py: error: {error}")
+
+        timings[stage] = time.perf_counter() - start
+
+    if args.timings:
+        for name, seconds in timings.items():
+            print(f"⏱ {name}: {seconds:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,33 @@
+import argparse
+import json
 import os
+import time
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.decomposition import PCA
+from sklearn.metrics import adjusted_rand_score, silhouette_score
+from joblib import Parallel, delayed
+
+from loader import file_fingerprint, iter_table_chunks, load_table, source_digest
+from model_store import load_artifact, save_artifact
+from player_index import PlayerIndex, save_index
+from table_schema import format_csv_columns, resolve_table_path
 
 # Tạo thư mục lưu kết quả
 BASE_DIR = os.path.join('REPORT_BTL', 'BTL3_File')  # Thay đổi đường dẫn đến thư mục mong muốn
 os.makedirs(BASE_DIR, exist_ok=True)
+MODEL_ROOT = os.path.join(BASE_DIR, 'models')
+MODEL_NAME = 'player_clusters'
 
-def load_and_preprocess_data(file_path):
+def load_and_preprocess_data(file_path, competitions=None, seasons=None):
     """
-    Đọc và chuẩn hóa dữ liệu số từ file CSV.
+    Đọc và chuẩn hóa dữ liệu số từ file CSV, Parquet hoặc index các shard.
     """
-    df = pd.read_csv(file_path, header=2)
+    df = load_table(file_path, competitions, seasons)
 
     # Chỉ giữ lại các cột số, bỏ cột 'Age' nếu có
     numeric_df = df.select_dtypes(include='number').drop(columns=['Age'], errors='ignore')
@@ -26,39 +39,101 @@ def load_and_preprocess_data(file_path):
     scaler = StandardScaler()
     scaled_data = scaler.fit_transform(numeric_df)
 
-    return df, numeric_df, scaled_data
+    return df, numeric_df, scaled_data, scaler
+
+
+def fit_kmeans(data, k):
+    """
+    Huấn luyện một mô hình KMeans, trả về (k, mô hình, thời gian huấn luyện).
+    """
+    start = time.perf_counter()
+    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+    kmeans.fit(data)
+    return k, kmeans, time.perf_counter() - start
 
 
-def find_optimal_k(data):
+def sweep_k(data, k_values, n_jobs=-1):
     """
-    Tìm số cụm tối ưu bằng Elbow Method và lưu biểu đồ.
+    Huấn luyện song song các mô hình KMeans cho từng k, giữ lại tất cả mô hình.
     """
-    wcss = []
-    for i in range(1, 11):
-        kmeans = KMeans(n_clusters=i, random_state=42, n_init=10)
-        kmeans.fit(data) 
-        wcss.append(kmeans.inertia_)
+    results = Parallel(n_jobs=n_jobs)(delayed(fit_kmeans)(data, k) for k in k_values)
+    models = {k: model for k, model, _ in results}
+    fit_times = {k: seconds for k, _, seconds in results}
+    return models, fit_times
+
+
+def find_knee(k_values, wcss):
+    """
+    Điểm khuỷu của đường WCSS: điểm xa nhất so với đoạn thẳng nối điểm đầu và điểm cuối
+    (sau khi chuẩn hoá cả hai trục về [0, 1]).
+    """
+    x = np.asarray(k_values, dtype=float)
+    y = np.asarray(wcss, dtype=float)
+    if len(x) < 3 or y[0] == y[-1]:
+        return int(x[0])
+    x = (x - x[0]) / (x[-1] - x[0])
+    y = (y - y[-1]) / (y[0] - y[-1])
+    # Đoạn thẳng nối (0, 1) và (1, 0): khoảng cách tỉ lệ với |x + y - 1|
+    return int(k_values[int(np.argmax(np.abs(x + y - 1)))])
+
+
+def sampled_silhouette(data, labels, sample_size=2000):
+    """
+    Silhouette score trên một mẫu ngẫu nhiên (cố định random_state) để không phải tính O(n²) trên toàn bộ dữ liệu.
+    """
+    sample_size = min(sample_size, len(data)) if sample_size else None
+    return silhouette_score(data, labels, sample_size=sample_size, random_state=42)
+
+
+def find_optimal_k(data, k_max=10, n_jobs=-1, sample_size=2000):
+    """
+    Tìm số cụm tối ưu: quét k = 1..k_max song song, lấy điểm khuỷu của WCSS,
+    rồi chọn trong {khuỷu - 1, khuỷu, khuỷu + 1} giá trị có silhouette cao nhất.
+    Trả về (k tối ưu, dict {k: mô hình đã huấn luyện}). Lưu biểu đồ Elbow.
+    """
+    k_values = list(range(1, min(k_max, len(data)) + 1))
+
+    start = time.perf_counter()
+    models, fit_times = sweep_k(data, k_values, n_jobs)
+    sweep_time = time.perf_counter() - start
+    wcss = [models[k].inertia_ for k in k_values]
+
+    knee = find_knee(k_values, wcss)
+    candidates = [k for k in (knee - 1, knee, knee + 1) if k in models and k >= 2]
+
+    start = time.perf_counter()
+    silhouettes = {k: sampled_silhouette(data, models[k].labels_, sample_size) for k in candidates}
+    silhouette_time = time.perf_counter() - start
+    optimal_k = max(silhouettes, key=silhouettes.get) if silhouettes else knee
 
+    print(f"k sweep: {len(k_values)} models in {sweep_time:.2f}s "
+          f"(sum of fit times {sum(fit_times.values()):.2f}s)")
+    print(f"Knee of WCSS: k={knee}; silhouette "
+          + ", ".join(f"k={k}: {score:.3f}" for k, score in silhouettes.items())
+          + f" ({silhouette_time:.2f}s)")
+    print(f"Chosen k = {optimal_k}")
 
     # Vẽ biểu đồ Elbow Method
     plt.figure(figsize=(8, 5))
-    plt.plot(range(1, 11), wcss, marker='o')
-    plt.title(f"Elbow Method - Chọn số cụm tối ưu k ")
+    plt.plot(k_values, wcss, marker='o')
+    plt.axvline(optimal_k, color='red', linestyle='--', label=f"k = {optimal_k}")
+    plt.title(f"Elbow Method - Chọn số cụm tối ưu k = {optimal_k}")
     plt.xlabel("Số cụm (k)")
     plt.ylabel("WCSS")
+    plt.legend()
     plt.grid(True)
     plt.tight_layout()
     plt.savefig(os.path.join(BASE_DIR, "Elbow_Method.png"), dpi=300)
     plt.close()
-    optimal_k = 4
-    return optimal_k
+    return optimal_k, models
 
-def perform_kmeans(data, k):
+def perform_kmeans(data, k, model=None):
     """
-    Thực hiện phân cụm KMeans.
+    Thực hiện phân cụm KMeans. Nếu đã có mô hình cho k (từ bước quét k) thì dùng lại nhãn của nó.
     """
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    cluster_labels = kmeans.fit_predict(data)
+    if model is None:
+        _, model, _ = fit_kmeans(data, k)
+    cluster_labels = model.labels_.copy()
     
     # Chỉnh lại nhãn để bắt đầu từ 1 thay vì 0
     cluster_labels += 1
@@ -66,12 +141,11 @@ def perform_kmeans(data, k):
     return cluster_labels
 
 
-def reduce_with_pca(data):
+def fit_pca(data):
     """
-    Giảm chiều dữ liệu bằng PCA (2 thành phần chính).
+    Huấn luyện PCA (2 thành phần chính), giữ lại để chiếu cầu thủ mới vào cùng không gian.
     """
-    pca = PCA(n_components=2)
-    return pca.fit_transform(data)
+    return PCA(n_components=2).fit(data)
 
 def plot_clusters(pca_data, cluster_labels):
     """
@@ -92,44 +166,332 @@ def plot_clusters(pca_data, cluster_labels):
     plt.close()
     print(f"Successful plot Kmean PCA")
 
-def save_cluster_analysis(result_df, output_file):
+# ==== Hồ sơ cụm: một lần groupby cho size/mean/median, z-score so với trung bình chung ====
+def cluster_profiles(result_df):
+    """
+    Trả về dict: 'size' (Series), 'mean', 'median', 'zscore' (DataFrame, index là cụm)
+    và 'names' (Series danh sách tên theo cụm, None nếu không có cột 'Name').
+    Giá trị thiếu được tính là 0 như lúc phân cụm (và như chế độ streaming), nên hồ sơ mô tả
+    đúng dữ liệu KMeans đã thấy, ví dụ chỉ số thủ môn của cụm cầu thủ đá ngoài là 0.
     """
-    Lưu thông tin phân tích các cụm vào file TXT.
+    numeric = result_df.select_dtypes(include='number').drop(columns=['Cluster', 'PC1', 'PC2'], errors='ignore')
+    numeric = numeric.astype('float64').fillna(0)
+    grouped = numeric.groupby(result_df['Cluster'])
+    stats = grouped.agg(['mean', 'median'])
+    mean = stats.xs('mean', axis=1, level=1)
+
+    names = None
+    if 'Name' in result_df.columns:
+        names = result_df['Name'].astype(str).groupby(result_df['Cluster']).agg(list)
+
+    return {
+        'size': grouped.size(),
+        'mean': mean,
+        'median': stats.xs('median', axis=1, level=1),
+        'zscore': (mean - numeric.mean()) / numeric.std(ddof=0).replace(0, np.nan),
+        'names': names,
+    }
+
+
+def distinguishing_features(zscore, top=5):
+    """
+    Với mỗi cụm: `top` chỉ số lệch nhiều nhất so với trung bình chung (theo |z|).
+    """
+    abs_z = zscore.abs().fillna(0).to_numpy()
+    order = np.argsort(-abs_z, axis=1, kind='stable')[:, :top]
+    columns = zscore.columns.to_numpy()
+    return {c: [(columns[j], float(zscore.iloc[i, j])) for j in order[i]]
+            for i, c in enumerate(zscore.index)}
+
+
+def save_cluster_analysis(result_df, output_file, profiles=None, top_features=5):
     """
+    Lưu phân tích các cụm vào file TXT, kèm bản CSV và JSON cùng tên,
+    tất cả ghi từ một kết quả `cluster_profiles`.
+    """
+    profiles = profiles if profiles is not None else cluster_profiles(result_df)
+    size, mean, median, names = profiles['size'], profiles['mean'], profiles['median'], profiles['names']
+    distinguishing = distinguishing_features(profiles['zscore'], top_features)
+
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("--- PHÂN TÍCH CỤM CẦU THỦ ---\n")
-        for c in sorted(result_df['Cluster'].unique()):
-            group = result_df[result_df['Cluster'] == c]
+        for c in size.index:
             f.write(f"\n=============================\n")
-            f.write(f"✅ Cụm {c} - Số cầu thủ: {len(group)}\n")
+            f.write(f"✅ Cụm {c} - Số cầu thủ: {size[c]}\n")
 
-            if 'Name' in group.columns:
-                f.write("🔹 Tên cầu thủ: " + ", ".join(group['Name'].astype(str).tolist()) + "\n")
+            if names is not None:
+                f.write("🔹 Tên cầu thủ: " + ", ".join(names[c]) + "\n")
             else:
                 f.write("Không có cột 'Name' để hiển thị tên.\n")
 
-            # Tính trung bình cho các chỉ số số học
-            stats = group.select_dtypes(include='number').mean().round(2)
             f.write("🔍 Trung bình chỉ số cụm:\n")
-            f.write(stats.to_string())
+            f.write(mean.loc[c].round(2).to_string())
             f.write("\n")
 
+            f.write("⭐ Chỉ số đặc trưng (z-score so với trung bình chung): "
+                    + ", ".join(f"{name} {z:+.2f}" for name, z in distinguishing[c]) + "\n")
+
         print(f"Successful Saved to {output_file}")
 
+    # Bản cho máy đọc: một dòng mỗi cụm, cột '<chỉ số> (mean|median|z)'
+    base = os.path.splitext(output_file)[0]
+    parts = {kind: part for kind, part in (('mean', mean), ('median', median), ('z', profiles['zscore']))
+             if part is not None}
+    table = pd.concat(parts, axis=1).swaplevel(axis=1)
+    table = table[[(name, kind) for name in mean.columns for kind in parts]]
+    table.columns = [f"{name} ({kind})" for name, kind in table.columns]
+    pd.concat([size.rename('Size'), table], axis=1).to_csv(base + '.csv', encoding='utf-8-sig')
+
+    # JSON chuẩn không có NaN: giá trị không xác định (ví dụ z-score của chỉ số không đổi) ghi là null
+    def json_number(value):
+        return None if pd.isna(value) else round(float(value), 4)
+
+    report = {
+        str(c): {
+            'size': int(size[c]),
+            'mean': {name: json_number(v) for name, v in mean.loc[c].items()},
+            'median': {name: json_number(v) for name, v in median.loc[c].items()} if median is not None else None,
+            'distinguishing': [{'feature': name, 'zscore': json_number(z)} for name, z in distinguishing[c]],
+        }
+        for c in size.index
+    }
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, allow_nan=False)
+    print(f"Successful Saved to {base}.csv, {base}.json")
+
+# ==== Chế độ streaming: đọc từng khối từ đĩa, bộ nhớ không phụ thuộc số cầu thủ ====
+def chunk_features(chunk, features):
+    """
+    Ma trận chỉ số của một khối (thiếu = 0), đúng thứ tự cột `features`.
+    """
+    return chunk.reindex(columns=features).fillna(0).to_numpy(dtype=np.float64)
+
+
+def stream_scaler(file_path, chunk_size, sample_size, competitions=None, seasons=None):
+    """
+    Lượt 1: tích luỹ mean/var của StandardScaler bằng partial_fit và giữ một mẫu ngẫu nhiên
+    tối đa `sample_size` dòng (các dòng có khoá ngẫu nhiên nhỏ nhất).
+    Trả về (danh sách cột chỉ số, scaler, mẫu chưa chuẩn hoá, các cột ghi dạng chuỗi fbref khi xuất CSV:
+    cột có giá trị thiếu ở bất kỳ khối nào và cột phút, như `format_csv_columns` chọn trên cả bảng).
+    """
+    scaler = StandardScaler()
+    rng = np.random.default_rng(42)
+    features, sample, keys, text_columns = None, None, None, {'Minutes'}
+    for chunk in iter_table_chunks(file_path, chunk_size, competitions, seasons):
+        if features is None:
+            features = list(chunk.select_dtypes(include='number').columns.drop('Age', errors='ignore'))
+        text_columns.update(chunk.columns[chunk.isna().any()])
+        data = chunk_features(chunk, features)
+        scaler.partial_fit(data)
+
+        chunk_keys = rng.random(len(data))
+        if sample is None:
+            sample, keys = data, chunk_keys
+        else:
+            sample, keys = np.vstack([sample, data]), np.concatenate([keys, chunk_keys])
+        if len(keys) > sample_size:
+            keep = np.sort(np.argpartition(keys, sample_size)[:sample_size])
+            sample, keys = sample[keep], keys[keep]
+    return features, scaler, sample, text_columns
+
+
+def stream_kmeans(file_path, features, scaler, init_centers, chunk_size, epochs=1, competitions=None, seasons=None):
+    """
+    Lượt 2: MiniBatchKMeans.partial_fit trên từng khối đã chuẩn hoá, khởi tạo từ tâm cụm
+    của KMeans trên mẫu nên nhãn khớp với kết quả full-batch khi dữ liệu nhỏ.
+    """
+    kmeans = MiniBatchKMeans(n_clusters=len(init_centers), init=init_centers, n_init=1, random_state=42)
+    for _ in range(epochs):
+        for chunk in iter_table_chunks(file_path, chunk_size, competitions, seasons):
+            kmeans.partial_fit(scaler.transform(chunk_features(chunk, features)))
+    return kmeans
+
+
+def stream_assign(file_path, features, scaler, kmeans, output_file, chunk_size, competitions=None, seasons=None,
+                  text_columns=None):
+    """
+    Lượt 3: gán nhãn cụm (bắt đầu từ 1) cho từng khối, ghi nối tiếp vào file CSV
+    và cộng dồn số cầu thủ, tổng chỉ số
+    và tổng bình phương chỉ số của mỗi cụm. Trả về hồ sơ cụm như `cluster_profiles` (không có median, tên).
+    `text_columns` (từ `stream_scaler`) giữ định dạng CSV giống nhau giữa các khối.
+    """
+    k = kmeans.n_clusters
+    counts = np.zeros(k, dtype=np.int64)
+    sums = np.zeros((k, len(features)))
+    squares = np.zeros((k, len(features)))
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, chunk in enumerate(iter_table_chunks(file_path, chunk_size, competitions, seasons)):
+            data = chunk_features(chunk, features)
+            labels = kmeans.predict(scaler.transform(data))
+            counts += np.bincount(labels, minlength=k)
+            np.add.at(sums, labels, data)
+            np.add.at(squares, labels, data ** 2)
+
+            chunk = chunk.copy()
+            chunk['Cluster'] = labels + 1
+            format_csv_columns(chunk, text_columns).to_csv(f, header=(i == 0), index=False)
+
+    clusters = pd.RangeIndex(1, k + 1, name='Cluster')
+    mean = pd.DataFrame(sums / np.maximum(counts, 1)[:, None], columns=features, index=clusters)
+    total = counts.sum()
+    global_mean = sums.sum(axis=0) / total
+    global_std = np.sqrt(np.maximum(squares.sum(axis=0) / total - global_mean ** 2, 0))
+    return {
+        'size': pd.Series(counts, index=clusters),
+        'mean': mean,
+        'median': None,
+        'zscore': (mean - global_mean) / pd.Series(global_std, index=features).replace(0, np.nan),
+        'names': None,
+    }
+
+
+def run_streaming(args):
+    """
+    Phân cụm cầu thủ không cần nạp toàn bộ bảng: số cụm được chọn trên mẫu,
+    MiniBatchKMeans học trên từng khối, nhãn được ghi ra theo từng khối.
+    """
+    start = time.perf_counter()
+    features, scaler, sample, text_columns = stream_scaler(args.input, args.chunk_size, args.sample_size,
+                                             args.competitions, args.seasons)
+    scaled_sample = scaler.transform(sample)
+    print(f"Pass 1 (scaling statistics, {int(scaler.n_samples_seen_)} rows, sample {len(sample)}): "
+          f"{time.perf_counter() - start:.2f}s")
+
+    if args.k:
+        optimal_k, models = args.k, {args.k: fit_kmeans(scaled_sample, args.k)[1]}
+    else:
+        optimal_k, models = find_optimal_k(scaled_sample, args.k_max, args.jobs, args.silhouette_sample)
+    sample_model = models[optimal_k]
+
+    start = time.perf_counter()
+    kmeans = stream_kmeans(args.input, features, scaler, sample_model.cluster_centers_, args.chunk_size,
+                           args.epochs, args.competitions, args.seasons)
+    print(f"Pass 2 (MiniBatchKMeans, k={optimal_k}, {args.epochs} epoch(s)): {time.perf_counter() - start:.2f}s")
+
+    sample_labels = kmeans.predict(scaled_sample)
+    agreement = adjusted_rand_score(sample_model.labels_, sample_labels)
+    print(f"Agreement with full-batch KMeans on the sample (ARI): {agreement:.3f}")
+
+    start = time.perf_counter()
+    output_csv = os.path.join(BASE_DIR, "Table_EPL_Clustered.csv")
+    profiles = stream_assign(args.input, features, scaler, kmeans, output_csv, args.chunk_size,
+                             args.competitions, args.seasons, text_columns)
+    print(f"Pass 3 (assign labels): {time.perf_counter() - start:.2f}s")
+    print(f"Successful save to csv file")
+
+    # Biểu đồ PCA vẽ trên mẫu
+    pca = fit_pca(scaled_sample)
+    plot_clusters(pca.transform(scaled_sample), sample_labels + 1)
+    save_cluster_analysis(None, os.path.join(BASE_DIR, "Cluster_Analysis.txt"), profiles)
+    save_cluster_model(args, features, scaler, kmeans, pca)
+
+# ==== Lưu / nạp mô hình phân cụm (scaler + KMeans + PCA) ====
+def save_cluster_model(args, features, scaler, kmeans, pca):
+    """
+    Lưu pipeline đã huấn luyện kèm metadata: cột chỉ số, dấu vân tay dữ liệu, số cụm.
+    """
+    metadata = {
+        'features': list(features),
+        'k': int(kmeans.n_clusters),
+        'engine': args.engine,
+        'input': args.input,
+        'competitions': args.competitions,
+        'seasons': args.seasons,
+        'data_fingerprint': file_fingerprint(args.input),
+        'data_digest': source_digest(args.input),
+    }
+    version, folder = save_artifact(MODEL_NAME, {'scaler': scaler, 'kmeans': kmeans, 'pca': pca},
+                                    metadata, MODEL_ROOT)
+    print(f"Saved cluster model v{version} to {folder}")
+
+
+def assign_clusters(df, objects, features):
+    """
+    Gán cụm (bắt đầu từ 1) và toạ độ PCA cho các cầu thủ trong `df` bằng mô hình đã lưu,
+    chuẩn hoá một lần cho cả bảng.
+    """
+    missing = [name for name in features if name not in df.columns]
+    if missing:
+        raise ValueError(f"Input table lacks feature columns used by the model: {missing}")
+
+    data = df[features].fillna(0)
+    if not hasattr(objects['scaler'], 'feature_names_in_'):
+        # Mô hình streaming học trên mảng float64 không có tên cột
+        data = data.to_numpy(dtype=np.float64)
+    scaled = objects['scaler'].transform(data)
+    result = df.copy()
+    result['Cluster'] = objects['kmeans'].predict(scaled) + 1
+    pca_data = objects['pca'].transform(scaled)
+    result['PC1'] = pca_data[:, 0]
+    result['PC2'] = pca_data[:, 1]
+    return result
+
+
+def run_assign(args):
+    """
+    Chế độ assign: nạp mô hình đã lưu, gán cụm cho cầu thủ mới/cập nhật mà không huấn luyện lại.
+    """
+    objects, metadata = load_artifact(MODEL_NAME, args.model_version, MODEL_ROOT)
+    df = load_table(args.input, args.competitions, args.seasons)
+    # Với index các shard, so cả nội dung các shard chứ không chỉ file index
+    if source_digest(args.input) == metadata.get('data_digest'):
+        print("Note: input is the same data the model was trained on")
+
+    start = time.perf_counter()
+    result = assign_clusters(df, objects, metadata['features'])
+    elapsed = time.perf_counter() - start
+
+    output_file = os.path.join(BASE_DIR, "Assigned_Clusters.csv")
+    format_csv_columns(result).to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"Assigned {len(result)} players with model v{metadata['version']} (k={metadata['k']}) "
+          f"in {elapsed * 1000:.1f} ms → {output_file}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Cluster players with KMeans')
+    parser.add_argument('--input', default=resolve_table_path("Table_EPL.csv"), help='Table_EPL.csv/.parquet or a shard index.json')
+    parser.add_argument('--competitions', nargs='+', help='Shards to load (with a shard index)')
+    parser.add_argument('--seasons', nargs='+', help='Seasons to load (with a shard index)')
+    parser.add_argument('--k', type=int, help='Use this number of clusters instead of choosing it automatically')
+    parser.add_argument('--k-max', type=int, default=10, help='Largest k tried in the sweep')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel jobs for the k sweep (-1 = all cores)')
+    parser.add_argument('--silhouette-sample', type=int, default=2000, help='Rows sampled for the silhouette score (0 = all)')
+    parser.add_argument('--engine', choices=['kmeans', 'minibatch'], default='kmeans',
+                        help="'minibatch' streams the table in chunks with MiniBatchKMeans (bounded memory)")
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per chunk in minibatch mode')
+    parser.add_argument('--sample-size', type=int, default=20000, help='Rows kept in memory to choose k and draw the PCA plot (minibatch mode)')
+    parser.add_argument('--epochs', type=int, default=1, help='Passes over the table for MiniBatchKMeans')
+    parser.add_argument('--mode', choices=['fit', 'assign'], default='fit',
+                        help="'assign' labels the input players with the saved model instead of refitting")
+    parser.add_argument('--model-version', type=int, help='Saved model version used by assign mode (default: latest)')
+    return parser.parse_args()
+
 def main():
-    file_path = "Table_EPL.csv"
+    args = parse_args()
+    if args.mode == 'assign':
+        run_assign(args)
+        return
+    if args.engine == 'minibatch':
+        run_streaming(args)
+        return
 
     # Bước 1: Load và chuẩn hóa dữ liệu
-    df_raw, df_numeric, scaled_data = load_and_preprocess_data(file_path)
+    df_raw, df_numeric, scaled_data, scaler = load_and_preprocess_data(args.input, args.competitions, args.seasons)
 
     # Bước 2: Tìm số cụm tối ưu
-    optimal_k = find_optimal_k(scaled_data)
+    start = time.perf_counter()
+    if args.k:
+        optimal_k, models = args.k, {}
+    else:
+        optimal_k, models = find_optimal_k(scaled_data, args.k_max, args.jobs, args.silhouette_sample)
 
-    # Bước 3: Phân cụm KMeans
-    clusters = perform_kmeans(scaled_data, optimal_k)
+    # Bước 3: Phân cụm KMeans (dùng lại mô hình đã huấn luyện khi quét k)
+    kmeans = models.get(optimal_k) or fit_kmeans(scaled_data, optimal_k)[1]
+    clusters = perform_kmeans(scaled_data, optimal_k, kmeans)
+    print(f"Clustering with k={optimal_k} took {time.perf_counter() - start:.2f}s")
 
     # Bước 4: Giảm chiều bằng PCA
-    pca_data = reduce_with_pca(scaled_data)
+    pca = fit_pca(scaled_data)
+    pca_data = pca.transform(scaled_data)
 
     # Bước 5: Vẽ biểu đồ phân cụm
     plot_clusters(pca_data, clusters)
@@ -137,13 +499,22 @@ def main():
     # Bước 6: Gắn nhãn cụm vào DataFrame gốc và lưu
     result_df = df_raw.loc[df_numeric.index].copy()
     result_df['Cluster'] = clusters
-    result_df.to_csv(os.path.join(BASE_DIR, "Table_EPL_Clustered.csv"), index=False, encoding='utf-8-sig')
+    format_csv_columns(result_df).to_csv(os.path.join(BASE_DIR, "Table_EPL_Clustered.csv"), index=False,
+                                         encoding='utf-8-sig')
     print(f"Successful save to csv file")
 
     # Bước 7: Ghi phân tích cụm vào file
     analysis_file = os.path.join(BASE_DIR, "Cluster_Analysis.txt")
     save_cluster_analysis(result_df, analysis_file)
 
+    # Bước 8: Lưu mô hình để gán cụm cho cầu thủ mới
+    save_cluster_model(args, df_numeric.columns, scaler, kmeans, pca)
+
+    # Bước 9: Dựng và lưu index tìm cầu thủ tương tự trên cùng ma trận đã chuẩn hoá
+    index = PlayerIndex.from_frame(df_raw.loc[df_numeric.index], scaled_data)
+    save_index(index, {'features': list(df_numeric.columns), 'input': args.input,
+                       'data_fingerprint': file_fingerprint(args.input)}, MODEL_ROOT)
+
 if __name__ == "__main__":
     main()
 
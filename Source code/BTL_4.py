@@ -1,117 +1,205 @@
+import argparse
+import json
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
+import requests
+from scipy.stats import loguniform, randint
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.model_selection import KFold, RandomizedSearchCV, train_test_split
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_absolute_error
 from bs4 import BeautifulSoup
 
-# Hàm chuẩn hóa tuổi từ chuỗi 'tuổi-ngày' thành dạng số thực
-def standardize_age(age_string):
-    """
-    Chuẩn hóa tuổi từ định dạng 'tuổi-ngày' thành số thực.
-    """
-    try:
-        age, days = map(int, age_string.split('-'))
-        age += days / 365  # Chuyển số ngày thành phần của tuổi
-        return round(age, 2)  # Làm tròn đến 2 chữ số thập phân
-    except:
-        return None  # Trả về None nếu không thể chuẩn hóa
+from fetcher import TokenBucket, create_session, fetch_page
+from field_parsing import format_prices, parse_age_years, parse_prices
+from name_match import DEFAULT_THRESHOLD, match_names, normalize_key
+from page_cache import CACHE_DIR, DEFAULT_TTL, CacheMiss, PageCache
+from loader import file_fingerprint, load_table
+from model_store import save_artifact
+from table_schema import format_csv_columns, resolve_table_path
+from valuation_service import MODEL_NAME, MODEL_ROOT
+
+LISTING_URL = "https://www.footballtransfers.com/us/players/uk-premier-league/"
 
 # Hàm đọc và lọc dữ liệu từ CSV, chuẩn hóa tuổi và loại bỏ dữ liệu không hợp lệ
-def load_and_filter_data(input_path):
+def load_and_filter_data(input_path, competitions=None, seasons=None):
     """
-    Đọc dữ liệu từ CSV, chuẩn hóa tuổi và lọc các cầu thủ có hơn 900 phút thi đấu.
+    Đọc dữ liệu từ CSV hoặc Parquet, chuẩn hóa tuổi và lọc các cầu thủ có hơn 900 phút thi đấu.
     """
-    df = pd.read_csv(input_path, header=[2])
+    df = load_table(input_path, competitions, seasons)
 
-    # Kiểm tra và chuyển dữ liệu không hợp lệ thành NaN cho cột 'Minutes'
-    df['Minutes'] = df['Minutes'].str.replace(',', '').apply(pd.to_numeric, errors='coerce')
     df = df.dropna(subset=['Minutes'])  # Loại bỏ các hàng có giá trị Minutes không hợp lệ
     df['Minutes'] = df['Minutes'].astype(int)  # Chuyển cột 'Minutes' thành kiểu int
 
     # Chuẩn hóa cột 'Age' và loại bỏ các hàng không hợp lệ
-    df['Age'] = df['Age'].apply(standardize_age)
+    df['Age'] = parse_age_years(df['Age']).to_numpy()
     df = df.dropna(subset=['Age'])
     df['Age'] = df['Age'].astype(int)
 
     # Chỉ giữ lại các hàng có 'Minutes' > 900
     return df[df['Minutes'] > 900]
 
-# Hàm crawl dữ liệu giá trị chuyển nhượng từ trang footballtransfers.com
-def crawl_transfer_values(player_names, max_pages=22):
+# Hàm lấy tên, đội và giá trị chuyển nhượng từ HTML của một trang danh sách
+def parse_listing_page(html):
     """
-    Crawl dữ liệu giá trị chuyển nhượng của các cầu thủ từ trang web footballtransfers.com.
+    Trả về danh sách (tên cầu thủ, giá trị, đội hoặc None) của mọi cầu thủ trong trang.
+    Trả về None nếu trang không có bảng danh sách.
     """
-    values = {name: None for name in player_names}
-    collected_data = {}
-
-    driver = webdriver.Chrome()
-    driver.get("https://www.footballtransfers.com/us/players/uk-premier-league/")
-
-    for _ in range(max_pages):
-        time.sleep(2)  # Chờ để tải dữ liệu
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        table = soup.find('table', class_='table-hover')
-        if not table:
-            break
-
-        name_tags = table.find_all('div', class_='text')
-        price_tags = table.find_all('span', class_='player-tag')
-
-        # Lấy tên và giá trị chuyển nhượng cho các cầu thủ cần tìm
-        for name_tag, price_tag in zip(name_tags, price_tags):
-            a_tag = name_tag.find('a')
-            if not a_tag:
-                continue
-            player_name = a_tag.get('title')
-            if player_name in player_names:
-                collected_data[player_name] = price_tag.text.strip()
-
-        try:
-            driver.find_element(By.CLASS_NAME, 'pagination_next_button').click()  # Chuyển trang
-        except:
-            break
-
-    driver.quit()
-    values.update(collected_data)  # Cập nhật giá trị chuyển nhượng vào từ điển
-    return values
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', class_='table-hover')
+    if not table:
+        return None
 
-# Hàm chuyển đổi giá trị tiền tệ từ chuỗi sang số thực
-def convert_price(price_str):
+    entries = []
+    name_tags = table.find_all('div', class_='text')
+    price_tags = table.find_all('span', class_='player-tag')
+
+    for name_tag, price_tag in zip(name_tags, price_tags):
+        a_tag = name_tag.find('a')
+        if not a_tag:
+            continue
+        # Đội (nếu có) là link tới trang đội trong cùng dòng
+        row = name_tag.find_parent('tr')
+        team_tag = row.find('a', href=lambda href: href and '/teams/' in href) if row else None
+        team = (team_tag.get('title') or team_tag.text.strip()) if team_tag else None
+        entries.append((a_tag.get('title'), price_tag.text.strip(), team))
+    return entries
+
+# URL của trang thứ `page` trong danh sách (trang 1 là chính `listing_url`)
+def listing_page_url(page, listing_url=LISTING_URL):
+    return listing_url if page == 1 else f"{listing_url.rstrip('/')}/{page}"
+
+# Dự phòng: crawl bằng Chrome khi trang danh sách chỉ hiện bảng sau khi chạy JavaScript
+def crawl_with_browser(player_names, max_pages, cache=None, listing_url=LISTING_URL):
     """
-    Chuyển giá trị tiền tệ từ chuỗi dạng '€1M', '€1K',... thành số thực.
+    Duyệt lần lượt các trang bằng nút 'pagination_next_button'. Chỉ import selenium khi cần.
     """
-    if not isinstance(price_str, str):
-        return None
-    try:
-        if 'M' in price_str:
-            return int(float(price_str.replace('€', '').replace('M', '').strip()) * 1_000_000)
-        elif 'K' in price_str:
-            return int(float(price_str.replace('€', '').replace('K', '').strip()) * 1_000)
-        else:
-            return int(float(price_str.replace('€', '').strip()))
-    except:
-        return None
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
 
-# Hàm chuyển giá trị tiền tệ từ số thực thành chuỗi có định dạng đẹp
-def convert_price_to_string(price):
+    entries = []
+    remaining = {normalize_key(name) for name in player_names}
+    driver = webdriver.Chrome()
+    try:
+        driver.get(listing_url)
+        for page in range(1, max_pages + 1):
+            time.sleep(2)  # Chờ để tải dữ liệu
+            html = driver.page_source
+            page_entries = parse_listing_page(html)
+            if page_entries is None:
+                break
+            if cache is not None:
+                cache.put(listing_page_url(page, listing_url), html)
+            entries.extend(page_entries)
+            remaining -= {normalize_key(name) for name, _, _ in page_entries}
+            if not remaining:
+                break
+
+            try:
+                driver.find_element(By.CLASS_NAME, 'pagination_next_button').click()  # Chuyển trang
+            except Exception:
+                break
+    finally:
+        driver.quit()
+    return entries
+
+# Hàm crawl danh sách cầu thủ và giá trị chuyển nhượng từ trang footballtransfers.com
+def fetch_listing(player_names, max_pages=22, cache=None, offline=False, listing_url=LISTING_URL,
+                  workers=4, rate=2.0, burst=4, session=None):
     """
-    Chuyển giá trị chuyển nhượng từ số thành chuỗi có định dạng '€1M' hoặc '€1K'.
+    Tải song song các trang danh sách theo số trang, giới hạn tốc độ bằng token bucket
+    (`rate` trang/giây, tối đa `burst` trang liền nhau), retry/backoff do session đảm nhận.
+    Dừng sớm khi mọi cầu thủ đã xuất hiện (theo khoá chuẩn hoá) hoặc gặp trang cuối (404 / không có bảng).
+    Các trang được lưu vào `cache` để lần chạy sau (hoặc chế độ offline) dùng lại.
+    Trả về danh sách (tên, giá trị, đội) theo thứ tự trang.
     """
-    if pd.isna(price):
-        return None
-    if price >= 1_000_000:
-        return f"€{price / 1_000_000:.1f}M"
-    elif price >= 1_000:
-        return f"€{price / 1_000:.1f}K"
-    else:
-        return f"€{price}"
+    remaining = {normalize_key(name) for name in player_names}
+    if offline and cache is None:
+        raise CacheMiss(listing_page_url(1, listing_url))
+
+    limiter = TokenBucket(rate, burst)
+    if not offline:
+        session = session or create_session(pool_size=workers)
+    stop = threading.Event()
+    last_page = [max_pages]  # Trang cuối đã biết, các luồng bỏ qua trang sau nó
+    fetched = [0]
+
+    def fetch(page):
+        if stop.is_set() or page > last_page[0]:
+            return page, None
+        try:
+            html = fetch_page(listing_page_url(page, listing_url), session, limiter, cache, offline)
+        except CacheMiss:
+            if page == 1:
+                raise
+            return page, None  # Offline: hết các trang đã lưu
+        except requests.HTTPError as error:
+            if page > 1 and error.response is not None and error.response.status_code == 404:
+                return page, None
+            raise
+        fetched[0] += 1
+        return page, html
+
+    start = time.perf_counter()
+    pages = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch, page) for page in range(1, max_pages + 1)]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            page, html = future.result()
+            page_entries = parse_listing_page(html) if html is not None else None
+            if page_entries is None:
+                last_page[0] = min(last_page[0], page - 1)
+                continue
+            pages[page] = page_entries
+            remaining -= {normalize_key(name) for name, _, _ in page_entries}
+            if not remaining:
+                stop.set()
+                for other in futures:
+                    other.cancel()
+
+    # Trang 1 không có bảng: trang cần JavaScript, crawl bằng trình duyệt
+    if 1 not in pages and not offline:
+        print("Listing table not in the HTML, falling back to the browser crawl")
+        pages = {1: crawl_with_browser(player_names, max_pages, cache, listing_url)}
+
+    entries = [entry for page in sorted(pages) for entry in pages[page]]
+    print(f"Listing: {len(entries)} players from {fetched[0]} page(s) in {time.perf_counter() - start:.2f}s")
+    return entries
+
+# Hàm lấy giá trị chuyển nhượng cho các cầu thủ fbref, ghép tên không cần trùng khớp hoàn toàn
+def crawl_transfer_values(player_names, max_pages=22, cache=None, offline=False, listing_url=LISTING_URL,
+                          workers=4, rate=2.0, burst=4, session=None, player_teams=None,
+                          threshold=DEFAULT_THRESHOLD, report_path=None):
+    """
+    Trả về dict {tên fbref: giá trị hoặc None}. Tên được ghép với danh sách bằng name_match
+    (bỏ dấu, sắp xếp từ, tên viết tắt, trigram theo đội rồi toàn bộ danh sách, ngưỡng `threshold`).
+    `player_teams` là dict {tên: đội} dùng để chặn theo đội. Báo cáo ghép tên được ghi ra `report_path`.
+    """
+    names = list(player_names)
+    entries = fetch_listing(names, max_pages, cache, offline, listing_url, workers, rate, burst, session)
+    listing_names = [name for name, _, _ in entries]
+    listing_teams = [team for _, _, team in entries]
+    has_teams = player_teams is not None and any(team is not None for team in listing_teams)
+
+    report = match_names(names, listing_names,
+                         [player_teams.get(name) for name in names] if has_teams else None,
+                         listing_teams if has_teams else None, threshold)
+    report['Transfer value'] = [entries[row][1] if row >= 0 else None for row in report['Listing Row']]
+
+    counts = report['Method'].value_counts()
+    print("Name matching: " + ", ".join(f"{method} {count}" for method, count in counts.items()))
+    if report_path:
+        report.drop(columns=['Listing Row']).to_csv(report_path, index=False, encoding='utf-8-sig')
+        print(f"Saved name match report to {report_path}")
+
+    return dict(zip(report['Name'], report['Transfer value']))
 
 # Hàm lưu dữ liệu đã lọc và cập nhật giá trị chuyển nhượng vào file CSV
 def save_filtered_data(df, transfer_values_dict, output_path):
@@ -119,44 +207,76 @@ def save_filtered_data(df, transfer_values_dict, output_path):
     Lưu dữ liệu đã lọc và thêm giá trị chuyển nhượng vào file CSV.
     """
     # Thêm cột 'Transfer values (numeric)' từ từ điển giá trị chuyển nhượng
-    df['Transfer values (numeric)'] = df['Name'].map(transfer_values_dict).map(convert_price)
+    df['Transfer values (numeric)'] = parse_prices(df['Name'].map(transfer_values_dict)).to_numpy()
 
     # Xoá các hàng không có giá trị hợp lệ
     df = df.dropna(subset=['Transfer values (numeric)']).copy()
 
     # Chuyển sang định dạng đẹp cho cột 'Transfer values'
-    df['Transfer values'] = df['Transfer values (numeric)'].apply(convert_price_to_string)
+    df['Transfer values'] = format_prices(df['Transfer values (numeric)']).to_numpy()
 
     # Lưu dữ liệu vào CSV
     df_to_save = df.drop(columns=['Transfer values (numeric)'])
-    df_to_save.to_csv(output_path, index=False, encoding='utf-8-sig')
+    format_csv_columns(df_to_save).to_csv(output_path, index=False, encoding='utf-8-sig')
     print(f"Saved updated data to {output_path}")
 
     return df  # Trả về dataframe đầy đủ để tiếp tục sử dụng
 
-# Hàm huấn luyện mô hình Random Forest và dự đoán giá trị chuyển nhượng
-def train_and_predict_with_pipeline(df):
+# Các cột dùng để định giá cầu thủ
+NUMERIC_FEATURES = ['Age', 'Minutes', 'Goals', 'Assists', 'Goal-Creating Actions (GCA)', 'Prg Passes Rec', 'Tkl']
+CATEGORICAL_FEATURES = ['Position']
+FEATURES = ['Age', 'Position', 'Minutes', 'Goals', 'Assists', 'Goal-Creating Actions (GCA)', 'Prg Passes Rec', 'Tkl']
+TARGET = 'Transfer values (numeric)'
+
+# Các mô hình có thể thử khi tìm kiếm siêu tham số: (mô hình, không gian tham số)
+MODEL_SEARCH_SPACES = {
+    'random_forest': (
+        lambda: RandomForestRegressor(random_state=42),
+        {
+            'model__n_estimators': randint(100, 500),
+            'model__max_depth': [None, 5, 10, 20],
+            'model__min_samples_leaf': randint(1, 10),
+            'model__max_features': ['sqrt', 0.5, 1.0],
+        },
+    ),
+    'hist_gradient_boosting': (
+        lambda: HistGradientBoostingRegressor(random_state=42),
+        {
+            'model__learning_rate': loguniform(0.01, 0.3),
+            'model__max_iter': randint(100, 600),
+            'model__max_leaf_nodes': randint(8, 64),
+            'model__min_samples_leaf': randint(5, 40),
+            'model__l2_regularization': loguniform(1e-3, 10),
+        },
+    ),
+}
+
+# Pipeline tiền xử lý + mô hình
+def build_pipeline(model):
     """
-    Huấn luyện mô hình Random Forest và dự đoán giá trị chuyển nhượng.
+    Chuẩn hoá các cột số, one-hot cột 'Position' (dạng dense để HistGradientBoosting dùng được).
     """
-    features = ['Age', 'Position', 'Minutes', 'Goals', 'Assists', 'Goal-Creating Actions (GCA)', 'Prg Passes Rec', 'Tkl']
-    target = 'Transfer values (numeric)'
-
-    X = df[features]
-    y = df[target]
-
-    # Tiền xử lý cho dữ liệu số và phân loại
     preprocessor = ColumnTransformer(transformers=[
-        ('num', StandardScaler(), ['Age', 'Minutes', 'Goals', 'Assists', 'Goal-Creating Actions (GCA)', 'Prg Passes Rec', 'Tkl']),
-        ('cat', OneHotEncoder(handle_unknown='ignore'), ['Position'])  # Chỉ một cột phân loại 'Position'
+        ('num', StandardScaler(), NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES)
     ])
-
-    # Xây dựng pipeline với mô hình Random Forest
-    pipeline = Pipeline(steps=[
+    return Pipeline(steps=[
         ('preprocessor', preprocessor),
-        ('model', RandomForestRegressor(n_estimators=100, random_state=42))
+        ('model', model)
     ])
 
+# Hàm huấn luyện mô hình Random Forest và dự đoán giá trị chuyển nhượng
+def train_and_predict_with_pipeline(df):
+    """
+    Huấn luyện mô hình Random Forest và dự đoán giá trị chuyển nhượng.
+    Trả về (pipeline đã huấn luyện, thông tin mô hình: tên, MAE trên tập kiểm tra).
+    """
+    X = df[FEATURES]
+    y = df[TARGET]
+
+    # Xây dựng pipeline với mô hình Random Forest (dùng mọi nhân CPU)
+    pipeline = build_pipeline(RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1))
+
     # Chia dữ liệu thành tập huấn luyện và tập kiểm tra
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -166,13 +286,115 @@ def train_and_predict_with_pipeline(df):
     # Dự đoán và tính toán lỗi tuyệt đối trung bình
     preds = pipeline.predict(X_test)
     mae = mean_absolute_error(y_test, preds)
-    print(f"MAE: {convert_price_to_string(mae)} €")
+    print(f"MAE: {format_prices([mae])[0]} €")
+    return pipeline, {'model': 'random_forest', 'test_mae': float(mae), 'train_rows': len(X_train)}
+
+# Tham số của bước 'model' trong pipeline dạng JSON (bỏ tiền tố 'model__')
+def model_params(params):
+    return json.dumps({key.split('__', 1)[1]: value for key, value in params.items()}, default=float)
+
+# Tìm mô hình tốt nhất: randomized search + k-fold CV chạy song song
+def search_models(df, models=tuple(MODEL_SEARCH_SPACES), n_iter=20, folds=5, n_jobs=-1, report_path=None):
+    """
+    Với mỗi mô hình trong `models`: RandomizedSearchCV (`n_iter` bộ tham số, `folds`-fold CV,
+    các fold/bộ tham số chạy song song trên `n_jobs` nhân) trên 80% dữ liệu,
+    rồi đánh giá bộ tham số tốt nhất trên 20% còn lại (cùng cách chia với chế độ mặc định).
+    In thời gian chạy và MAE của từng mô hình, ghi mọi ứng viên ra `report_path`.
+    Trả về (pipeline tốt nhất theo MAE CV, thông tin mô hình như train_and_predict_with_pipeline).
+    """
+    X = df[FEATURES]
+    y = df[TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    cv = KFold(n_splits=folds, shuffle=True, random_state=42)
+
+    candidates, summary, searches = [], [], {}
+    for name in models:
+        make_model, space = MODEL_SEARCH_SPACES[name]
+        search = RandomizedSearchCV(build_pipeline(make_model()), space, n_iter=n_iter, cv=cv,
+                                    scoring='neg_mean_absolute_error', n_jobs=n_jobs, random_state=42)
+        start = time.perf_counter()
+        search.fit(X_train, y_train)
+        wall_time = time.perf_counter() - start
+        test_mae = mean_absolute_error(y_test, search.predict(X_test))
+        searches[name] = search
+
+        results = pd.DataFrame(search.cv_results_)
+        candidates.append(pd.DataFrame({
+            'Model': name,
+            'Rank': results['rank_test_score'],
+            'CV MAE': -results['mean_test_score'],
+            'CV MAE std': results['std_test_score'],
+            'Fit time, all folds (s)': results['mean_fit_time'] * folds,
+            'Params': results['params'].map(model_params),
+        }))
+        summary.append({'Model': name, 'Wall time (s)': round(wall_time, 2), 'Best CV MAE': -search.best_score_,
+                        'Test MAE': test_mae})
+
+    summary = pd.DataFrame(summary).sort_values('Best CV MAE')
+    print("Model search (wall time vs MAE):")
+    print(summary.assign(**{'Best CV MAE': format_prices(summary['Best CV MAE']).to_numpy(),
+                            'Test MAE': format_prices(summary['Test MAE']).to_numpy()}).to_string(index=False))
+    if report_path:
+        pd.concat(candidates).sort_values(['Model', 'Rank']).to_csv(report_path, index=False, encoding='utf-8-sig')
+        print(f"Saved model search report to {report_path}")
+
+    best = summary['Model'].iloc[0]
+    print(f"Best model: {best} {model_params(searches[best].best_params_)}")
+    info = {'model': best, 'params': model_params(searches[best].best_params_),
+            'cv_mae': float(summary['Best CV MAE'].iloc[0]), 'test_mae': float(summary['Test MAE'].iloc[0]),
+            'train_rows': len(X_train)}
+    return searches[best].best_estimator_, info
+
+# Lưu pipeline định giá cùng schema đầu vào để valuation_service dùng lại
+def save_valuation_model(pipeline, info, input_path, model_root=MODEL_ROOT):
+    """
+    Metadata ghi danh sách cột, kiểu cột và các vị trí đã gặp khi huấn luyện.
+    """
+    positions = pipeline.named_steps['preprocessor'].named_transformers_['cat'].categories_[0]
+    metadata = dict(info,
+                    features=FEATURES,
+                    numeric_features=NUMERIC_FEATURES,
+                    categorical_features=CATEGORICAL_FEATURES,
+                    target=TARGET,
+                    positions=[str(position) for position in positions],
+                    input=input_path,
+                    data_fingerprint=file_fingerprint(input_path))
+    version, folder = save_artifact(MODEL_NAME, {'pipeline': pipeline}, metadata, model_root)
+    print(f"Saved valuation model v{version} to {folder}")
+    return version
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Crawl transfer values and train the valuation model')
+    parser.add_argument('--input', default=resolve_table_path("Table_EPL.csv"), help='Table_EPL.csv/.parquet or a shard index.json')
+    parser.add_argument('--competitions', nargs='+', help='Shards to load (with a shard index)')
+    parser.add_argument('--seasons', nargs='+', help='Seasons to load (with a shard index)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Directory of the on-disk page cache')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL, help='Seconds a cached page is reused without revalidation')
+    parser.add_argument('--no-cache', action='store_true', help='Always crawl, ignore the cache')
+    parser.add_argument('--offline', action='store_true', help='Replay listing pages from the cache, no network access')
+    parser.add_argument('--listing-url', default=LISTING_URL, help='First listing page (page N is <url>/N), e.g. a local test server')
+    parser.add_argument('--max-pages', type=int, default=22, help='Last listing page to fetch')
+    parser.add_argument('--workers', type=int, default=4, help='Listing pages fetched concurrently')
+    parser.add_argument('--rate', type=float, default=2.0, help='Average listing requests per second')
+    parser.add_argument('--burst', type=int, default=4, help='Requests allowed back to back before rate limiting')
+    parser.add_argument('--match-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Minimum trigram similarity (0-1) accepted for fuzzy name matches')
+    parser.add_argument('--train', choices=['single', 'search'], default='single',
+                        help="'search' runs a parallel randomized search with k-fold CV over the models in --models")
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_SEARCH_SPACES), default=list(MODEL_SEARCH_SPACES),
+                        help='Models tried by --train search')
+    parser.add_argument('--n-iter', type=int, default=20, help='Parameter settings sampled per model')
+    parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel jobs for the search (-1 = all cores)')
+    return parser.parse_args()
 
 # Hàm chính thực hiện toàn bộ quy trình
 def main():
     """
     Thực hiện toàn bộ quy trình từ việc tải, lọc dữ liệu, crawl giá trị chuyển nhượng, huấn luyện mô hình đến dự đoán giá trị cầu thủ.
     """
+    args = parse_args()
+
     # Đặt đường dẫn lưu vào thư mục REPORT_BTL/BTL4_File
     report_btl_path = "REPORT_BTL"
     btl4_file_path = os.path.join(report_btl_path, "BTL4_File")
@@ -180,20 +402,37 @@ def main():
     # Tạo thư mục REPORT_BTL và BTL4_File nếu chưa tồn tại
     os.makedirs(btl4_file_path, exist_ok=True)
 
-    input_path = "Table_EPL.csv"
+    input_path = args.input
     output_path = os.path.join(btl4_file_path, "Players_900mins.csv")
 
     # Bước 1: Đọc và lọc dữ liệu
-    filtered_df = load_and_filter_data(input_path)
+    filtered_df = load_and_filter_data(input_path, args.competitions, args.seasons)
 
     # Bước 2: Crawl dữ liệu giá trị chuyển nhượng
-    transfer_values = crawl_transfer_values(set(filtered_df['Name']))
+    cache = None if args.no_cache else PageCache(args.cache_dir, ttl=args.cache_ttl)
+    player_teams = dict(zip(filtered_df['Name'], filtered_df['Team'].astype(str)))
+    try:
+        transfer_values = crawl_transfer_values(player_teams, args.max_pages, cache, args.offline,
+                                                args.listing_url, args.workers, args.rate, args.burst,
+                                                player_teams=player_teams, threshold=args.match_threshold,
+                                                report_path=os.path.join(btl4_file_path, "Name_Match_Report.csv"))
+    except CacheMiss as error:
+        raise SystemExit(f"BTL_4.py: error: page not in cache: {error.url} (run without --offline to download it)")
+    if cache is not None and not args.offline:
+        cache.evict()
 
     # Bước 3: Lưu dữ liệu đã cập nhật giá trị chuyển nhượng
     df_updated = save_filtered_data(filtered_df, transfer_values, output_path)
 
     # Bước 4: Huấn luyện mô hình và dự đoán giá trị chuyển nhượng
-    train_and_predict_with_pipeline(df_updated)
+    if args.train == 'search':
+        pipeline, info = search_models(df_updated, args.models, args.n_iter, args.folds, args.jobs,
+                                       report_path=os.path.join(btl4_file_path, "Model_Search.csv"))
+    else:
+        pipeline, info = train_and_predict_with_pipeline(df_updated)
+
+    # Bước 5: Lưu mô hình để định giá cầu thủ mà không cần huấn luyện lại (valuation_service.py)
+    save_valuation_model(pipeline, info, input_path)
 
     print("✅ Successful")
 
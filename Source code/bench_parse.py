@@ -0,0 +1,80 @@
+"""
+So sánh tốc độ parse bảng fbref: cách cũ (parse cả trang bằng html.parser,
+mỗi field một lần tr.find) với cách mới trong BTL_1 (chỉ parse bảng cầu thủ,
+duyệt mỗi <tr> một lần).
+
+Cách dùng: python bench_parse.py stats.html keepers.html ... [--repeat 3]
+"""
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from BTL_1 import extract_data, find_player_table, get_soup, parse_row
+
+
+# ==== Cách cũ: giữ nguyên để làm mốc so sánh ====
+def legacy_extract_data(tr, fields):
+    row = []
+    for field in fields:
+        td = tr.find("td", {"data-stat": field})
+        value = td.text.strip() if td else 'N/a'
+        row.append(value if value != '' else 'N/a')
+    return row
+
+def legacy_parse(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    table = find_player_table(soup)
+    fields = table_fields(table)
+    rows = []
+    for tr in table.find('tbody').find_all('tr'):
+        player_td = tr.find('td', {'data-append-csv': True})
+        if player_td:
+            rows.append(legacy_extract_data(tr, fields))
+    return rows
+
+# ==== Cách mới ====
+def fast_parse(html):
+    soup = get_soup({'page': html}, 'page')
+    table = find_player_table(soup)
+    fields = table_fields(table)
+    rows = []
+    for tr in table.find('tbody').find_all('tr'):
+        cells, player_id = parse_row(tr)
+        if player_id:
+            rows.append(extract_data(cells, fields))
+    return rows
+
+# Lấy toàn bộ data-stat xuất hiện trong bảng
+def table_fields(table):
+    tr = table.find('tbody').find('tr')
+    return [td['data-stat'] for td in tr.find_all('td') if td.get('data-stat')]
+
+def bench(func, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [func(html) for html in pages]
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fbref table parsing')
+    parser.add_argument('fixtures', nargs='+', help='Saved fbref HTML pages')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.fixtures:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+
+    legacy_time, legacy_rows = bench(legacy_parse, pages, args.repeat)
+    fast_time, fast_rows = bench(fast_parse, pages, args.repeat)
+
+    print(f"Legacy: {legacy_time:.3f}s")
+    print(f"Fast:   {fast_time:.3f}s  (x{legacy_time / fast_time:.1f})")
+    print(f"Same output: {legacy_rows == fast_rows}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from page_cache import CacheMiss
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+# ==== Giới hạn tốc độ theo từng host ====
+class HostRateLimiter:
+    """
+    Đảm bảo hai request tới cùng một host cách nhau ít nhất `min_interval` giây.
+    An toàn khi dùng chung giữa nhiều luồng.
+    """
+    def __init__(self, min_interval=0.5):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ==== Token bucket: giới hạn tốc độ trung bình, cho phép dồn một ít request ====
+class TokenBucket:
+    """
+    Trung bình tối đa `rate` request/giây, tối đa `burst` request liền nhau.
+    Mỗi lần `wait` lấy một token (có thể "nợ" token và chờ cho tới khi đủ).
+    An toàn khi dùng chung giữa nhiều luồng; cùng giao diện với HostRateLimiter.
+    """
+    def __init__(self, rate=2.0, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self, url=None):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay > 0:
+            time.sleep(delay)
+
+
+# ==== Tạo session HTTP giữ kết nối (keep-alive) ====
+def create_session(pool_size=8, retries=3):
+    """
+    Tạo requests.Session với connection pool và retry/backoff cho lỗi tạm thời.
+    """
+    retry = Retry(total=retries, backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+# ==== Dự phòng: tải trang bằng trình duyệt khi trang cần JavaScript ====
+def fetch_with_browser(urls, wait=0.5):
+    """
+    Tải các URL bằng Chrome (Selenium). Chỉ import selenium khi thật sự cần.
+    """
+    from selenium import webdriver
+
+    pages = {}
+    driver = webdriver.Chrome()
+    try:
+        for url in urls:
+            driver.get(url)
+            time.sleep(wait)
+            pages[url] = driver.page_source
+            print(f"Browser fallback: {url}")
+    finally:
+        driver.quit()
+    return pages
+
+
+# ==== Tải một trang: cache, giới hạn tốc độ, request có điều kiện ====
+def fetch_page(url, session, limiter=None, cache=None, offline=False, timeout=30):
+    """
+    Trả về HTML của `url`. Trang còn mới lấy thẳng từ `cache`, trang cũ được kiểm tra lại
+    bằng request có điều kiện (304 = dùng lại bản trong cache). Với `offline=True` chỉ đọc cache.
+    Lỗi tạm thời (429, 5xx, mất kết nối) được session tự retry với backoff.
+    """
+    entry = cache.get(url) if cache is not None else None
+    if offline:
+        if entry is None:
+            raise CacheMiss(url)
+        return entry['html']
+    if cache is not None and cache.is_fresh(entry):
+        return entry['html']
+
+    if limiter is not None:
+        limiter.wait(url)
+    headers = cache.validators(entry) if cache is not None else {}
+    response = session.get(url, timeout=timeout, headers=headers)
+    if response.status_code == 304 and entry is not None:
+        cache.put(url, entry['html'], entry.get('etag'), entry.get('last_modified'))
+        return entry['html']
+    response.raise_for_status()
+    if 'charset' not in response.headers.get('Content-Type', ''):
+        response.encoding = 'utf-8'  # requests mặc định ISO-8859-1 khi server không ghi charset
+    if cache is not None:
+        cache.put(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return response.text
+
+
+# ==== Tải song song nhiều trang ====
+def fetch_pages(urls, max_workers=8, min_interval=0.5, validate=None, session=None, timeout=30,
+                cache=None, offline=False):
+    """
+    Tải song song các URL bằng một session dùng chung, giới hạn tốc độ theo host.
+    Trả về dict {url: html}. Nếu có `validate(html)` và trang không hợp lệ
+    (ví dụ dữ liệu chỉ xuất hiện sau khi chạy JS) thì tải lại trang đó bằng trình duyệt.
+    Nếu có `cache` (PageCache): trang còn mới lấy thẳng từ cache, trang cũ được
+    kiểm tra lại bằng request có điều kiện. Với `offline=True` chỉ đọc từ cache.
+    """
+    urls = list(dict.fromkeys(urls))
+    limiter = HostRateLimiter(min_interval)
+    if not offline:
+        session = session or create_session(pool_size=max_workers)
+
+    def fetch(url):
+        return fetch_page(url, session, limiter, cache, offline, timeout)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pages = dict(zip(urls, pool.map(fetch, urls)))
+
+    if validate is not None and not offline:
+        need_js = [url for url, html in pages.items() if not validate(html)]
+        if need_js:
+            rendered = fetch_with_browser(need_js)
+            if cache is not None:
+                for url, html in rendered.items():
+                    cache.put(url, html)
+            pages.update(rendered)
+
+    return pages
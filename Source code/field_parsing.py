@@ -0,0 +1,95 @@
+"""
+Đổi các trường dạng chuỗi sang số (và ngược lại) cho cả cột một lần:
+tuổi 'yy-ddd', số có dấu phẩy hàng nghìn '2,430', giá trị '€1.5M' / '€800K' / '€500'.
+Giá trị không hợp lệ hoặc thiếu trở thành NaN (khi định dạng: None / 'N/a').
+"""
+import numpy as np
+import pandas as pd
+
+AGE_PATTERN = r'^\s*\+?(\d+)\s*-\s*\+?(\d+)\s*$'
+
+
+def _as_strings(values):
+    return pd.Series(values).astype('string')
+
+
+# ==== Tuổi 'yy-ddd' -> số năm (làm tròn 2 chữ số) ====
+def parse_ages(values):
+    """
+    '27-123' -> 27.34. Chuỗi không đúng dạng 'yy-ddd' -> NaN.
+    """
+    parts = _as_strings(values).str.extract(AGE_PATTERN)
+    years = pd.to_numeric(parts[0]).to_numpy(dtype=float)
+    days = pd.to_numeric(parts[1]).to_numpy(dtype=float)
+    return pd.Series(np.round(years + days / 365, 2), index=parts.index)
+
+
+# ==== Tuổi dùng làm đặc trưng của mô hình định giá: số năm tròn ====
+def parse_age_years(values):
+    """
+    Tuổi như lúc huấn luyện BTL_4: 'yy-ddd' đổi bằng `parse_ages` rồi lấy phần nguyên ('27-300' -> 27.0).
+    Tuổi đã là số (27.8, '27') cũng được lấy phần nguyên. Không hợp lệ -> NaN.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        ages = series.astype('float64')
+    else:
+        ages = parse_ages(series).fillna(parse_counts(series))
+    return np.floor(ages)
+
+
+# ==== Số có dấu phẩy hàng nghìn ====
+def parse_counts(values):
+    """
+    '2,430' -> 2430.0, '81.5' -> 81.5, '' / 'N/a' -> NaN.
+    """
+    strings = _as_strings(values).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(strings, errors='coerce').astype('float64')
+
+
+def format_counts(values, na_rep='N/a'):
+    """
+    2430.0 -> '2,430' (phần thập phân bị bỏ như int()), NaN -> `na_rep`.
+    """
+    values = pd.Series(values, dtype='float64')
+    present = values.notna()
+    strings = values[present].astype('int64').astype(str)
+    strings = strings.str.replace(r'(\d)(?=(\d{3})+$)', r'\1,', regex=True)
+    return strings.reindex(values.index).astype(object).where(present, na_rep)
+
+
+# ==== Giá trị chuyển nhượng '€1.5M', '€800K', '€500' ====
+def parse_prices(values):
+    """
+    '€1.5M' -> 1500000.0, '-€1M' -> -1000000.0 (phần lẻ dưới 1 euro bị bỏ). Chuỗi không hợp lệ -> NaN.
+    Như cách đọc cũ: bỏ '€', có 'M' thì nhân 1e6, không có 'M' mà có 'K' thì nhân 1e3, phần còn lại là một số thực.
+    """
+    strings = _as_strings(values).str.replace('€', '', regex=False)
+    millions = strings.str.contains('M', regex=False).fillna(False).to_numpy(dtype=bool)
+    thousands = ~millions & strings.str.contains('K', regex=False).fillna(False).to_numpy(dtype=bool)
+    strings = strings.where(~millions, strings.str.replace('M', '', regex=False))
+    strings = strings.where(~thousands, strings.str.replace('K', '', regex=False))
+
+    amounts = pd.to_numeric(strings.str.strip(), errors='coerce').to_numpy(dtype=float)
+    prices = np.trunc(amounts * np.where(millions, 1_000_000, np.where(thousands, 1_000, 1)))
+    prices[~np.isfinite(prices)] = np.nan
+    return pd.Series(prices, index=strings.index)
+
+
+def format_prices(values):
+    """
+    1500000 -> '€1.5M', 800000 -> '€800.0K', 500.0 -> '€500.0', NaN -> None.
+    """
+    series = pd.Series(values, dtype='float64')
+    numbers = series.to_numpy()
+    result = np.full(len(numbers), None, dtype=object)
+
+    millions = numbers >= 1_000_000
+    thousands = (numbers >= 1_000) & ~millions
+    units = ~np.isnan(numbers) & ~millions & ~thousands
+    for mask, scale, suffix in ((millions, 1_000_000, 'M'), (thousands, 1_000, 'K')):
+        if mask.any():
+            result[mask] = np.char.add(np.char.add('€', np.char.mod('%.1f', numbers[mask] / scale)), suffix)
+    if units.any():
+        result[units] = np.char.add('€', numbers[units].astype(str))
+    return pd.Series(result, index=series.index, dtype=object)
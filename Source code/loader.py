@@ -0,0 +1,172 @@
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import table_schema
+from field_parsing import parse_counts
+from table_schema import CATEGORICAL_COLUMNS, COLUMNS, TEXT_COLUMNS, read_table, select_shards
+
+STAT_COLUMNS = [col[-1] for col in COLUMNS if col[-1] not in CATEGORICAL_COLUMNS + TEXT_COLUMNS]
+NA_VALUES = ['N/a']
+
+# Engine pyarrow đọc CSV nhanh hơn nhiều lần; dùng nếu đã cài
+try:
+    import pyarrow  # noqa: F401
+    DEFAULT_ENGINE = 'pyarrow'
+except ImportError:
+    DEFAULT_ENGINE = 'c'
+
+SNAPSHOT_DIR = '.snapshots'
+
+
+# ==== Kiểu dữ liệu của từng cột có trong file ====
+def column_dtypes(names, stat_dtype='float32'):
+    dtypes = {}
+    for name in names:
+        if name in CATEGORICAL_COLUMNS:
+            dtypes[name] = 'category'
+        elif name in TEXT_COLUMNS:
+            dtypes[name] = 'string'
+        elif name in STAT_COLUMNS:
+            dtypes[name] = stat_dtype
+    return dtypes
+
+
+# ==== Đọc Table_EPL.csv một lần, đúng kiểu ngay khi parse ====
+def read_csv_typed(path, stat_dtype='float32', engine=DEFAULT_ENGINE):
+    """
+    'N/a' là giá trị thiếu, '2,430' được đọc thành 2430, chỉ số dùng `stat_dtype`,
+    Team/Position/Nation là 'category'.
+    """
+    names = pd.read_csv(path, header=2, nrows=0).columns
+    dtypes = column_dtypes(names, stat_dtype)
+
+    if engine == 'pyarrow':
+        # Engine pyarrow không hỗ trợ `thousands`: đọc cột chỉ số chưa parse được thành chuỗi rồi bỏ dấu phẩy
+        df = pd.read_csv(path, header=2, engine='pyarrow', na_values=NA_VALUES)
+        for name in names:
+            if dtypes.get(name) == stat_dtype and not pd.api.types.is_numeric_dtype(df[name]):
+                df[name] = parse_counts(df[name]).to_numpy()
+        return df.astype(dtypes)
+
+    return pd.read_csv(path, header=2, dtype=dtypes, na_values=NA_VALUES, thousands=',')
+
+
+# ==== Đọc bảng theo từng khối, bộ nhớ không phụ thuộc kích thước file ====
+def iter_table_chunks(path, chunk_size=50000, competitions=None, seasons=None, stat_dtype='float32'):
+    """
+    Sinh lần lượt các DataFrame tối đa `chunk_size` dòng, cùng kiểu cột như `load_table`.
+    Với index các shard, mỗi khối có thêm cột 'Competition' và 'Season'.
+    """
+    if path.endswith('.json'):
+        for entry, shard_path in select_shards(path, competitions, seasons):
+            for chunk in iter_table_chunks(shard_path, chunk_size, stat_dtype=stat_dtype):
+                chunk['Competition'] = entry['competition']
+                chunk['Season'] = entry['season']
+                yield chunk
+        return
+
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            yield chunk.astype(column_dtypes(chunk.columns, stat_dtype))
+        return
+
+    names = pd.read_csv(path, header=2, nrows=0).columns
+    yield from pd.read_csv(path, header=2, dtype=column_dtypes(names, stat_dtype), na_values=NA_VALUES,
+                           thousands=',', chunksize=chunk_size)
+
+
+# ==== Phiên bản code làm sạch: đổi khi loader.py hoặc table_schema.py thay đổi ====
+def code_version():
+    digest = hashlib.sha256()
+    for module_path in (__file__, table_schema.__file__):
+        with open(module_path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# ==== Dấu vân tay của file nguồn: đường dẫn, kích thước, mtime và nội dung ====
+def file_fingerprint(path):
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': digest.hexdigest()}
+
+
+# ==== Dấu vân tay của file nguồn và, với index các shard, của mọi shard mà nó trỏ tới ====
+def source_fingerprints(path):
+    sources = [file_fingerprint(path)]
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            shards = json.load(f)['shards']
+        folder = os.path.dirname(path)
+        sources += [file_fingerprint(os.path.join(folder, entry['path'])) for entry in shards]
+    return sources
+
+
+# ==== Mã băm nội dung dữ liệu nguồn (không đổi khi chỉ mtime hoặc đường dẫn thay đổi) ====
+def source_digest(path):
+    contents = [source['sha256'] for source in source_fingerprints(path)]
+    return hashlib.sha256(json.dumps(contents).encode('utf-8')).hexdigest()
+
+
+# ==== Khoá của snapshot: (file nguồn + các shard + phiên bản code, tham số đọc) ====
+def snapshot_key(path, competitions, seasons, stat_dtype, engine):
+    source = {'sources': source_fingerprints(path), 'code': code_version()}
+    params = {
+        'competitions': sorted(competitions or []),
+        'seasons': sorted(seasons or []),
+        'stat_dtype': stat_dtype,
+        'engine': engine,
+    }
+
+    def digest(value):
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    return digest(source), digest(params)
+
+
+# ==== Đọc trực tiếp, không qua snapshot ====
+def parse_table(path, competitions=None, seasons=None, stat_dtype='float32', engine=DEFAULT_ENGINE):
+    if path.endswith('.csv'):
+        return read_csv_typed(path, stat_dtype, engine)
+
+    df = read_table(path, competitions, seasons)
+    return df.astype(column_dtypes(df.columns, stat_dtype))
+
+
+# ==== Loader dùng chung cho BTL_2, BTL_3, BTL_4 ====
+def load_table(path, competitions=None, seasons=None, stat_dtype='float32', engine=DEFAULT_ENGINE, cache=True):
+    """
+    Đọc file CSV, Parquet hoặc index các shard thành DataFrame đã có kiểu.
+    Với `cache=True`, bảng đã làm sạch được lưu thành snapshot Parquet trong thư mục
+    `.snapshots` cạnh file nguồn và dùng lại khi file nguồn, tham số đọc và code làm sạch
+    không đổi. Snapshot của phiên bản cũ (file nguồn hoặc code đã đổi) bị xoá khi ghi snapshot mới.
+    """
+    if not cache or DEFAULT_ENGINE != 'pyarrow':
+        return parse_table(path, competitions, seasons, stat_dtype, engine)
+
+    folder = os.path.join(os.path.dirname(os.path.abspath(path)), SNAPSHOT_DIR)
+    prefix = os.path.basename(path) + '.'
+    source_key, params_key = snapshot_key(path, competitions, seasons, stat_dtype, engine)
+    snapshot = os.path.join(folder, f"{prefix}{source_key}.{params_key}.parquet")
+    if os.path.exists(snapshot):
+        return pd.read_parquet(snapshot, memory_map=True)
+
+    df = parse_table(path, competitions, seasons, stat_dtype, engine)
+
+    os.makedirs(folder, exist_ok=True)
+    for other in glob.glob(os.path.join(folder, glob.escape(prefix) + '*.parquet')):
+        if not os.path.basename(other).startswith(prefix + source_key + '.'):
+            os.remove(other)
+    df.to_parquet(snapshot)
+    return df
@@ -0,0 +1,57 @@
+import json
+import os
+import time
+
+import joblib
+import sklearn
+
+MODEL_DIR = 'models'
+MODEL_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+
+
+# ==== Lưu mô hình đã huấn luyện theo phiên bản: <root>/<name>/v<N>/ ====
+def list_versions(name, root=MODEL_DIR):
+    folder = os.path.join(root, name)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(int(entry[1:]) for entry in os.listdir(folder)
+                  if entry.startswith('v') and entry[1:].isdigit())
+
+
+def save_artifact(name, objects, metadata, root=MODEL_DIR):
+    """
+    Ghi `objects` (dict các đối tượng sklearn) bằng joblib và `metadata` ra JSON
+    vào thư mục phiên bản mới. Trả về (phiên bản, thư mục).
+    """
+    versions = list_versions(name, root)
+    version = versions[-1] + 1 if versions else 1
+    folder = os.path.join(root, name, f"v{version}")
+    os.makedirs(folder)
+
+    joblib.dump(objects, os.path.join(folder, MODEL_FILE))
+    metadata = dict(metadata, name=name, version=version, created_at=time.time(),
+                    sklearn_version=sklearn.__version__)
+    with open(os.path.join(folder, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    return version, folder
+
+
+def load_artifact(name, version=None, root=MODEL_DIR):
+    """
+    Đọc phiên bản `version` (mặc định: mới nhất). Trả về (objects, metadata).
+    """
+    versions = list_versions(name, root)
+    if not versions:
+        raise FileNotFoundError(f"No saved model '{name}' in {root}")
+    version = version or versions[-1]
+    folder = os.path.join(root, name, f"v{version}")
+    if not os.path.isdir(folder):
+        raise FileNotFoundError(f"Model '{name}' has no version {version} (available: {versions})")
+
+    with open(os.path.join(folder, METADATA_FILE), 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata.get('sklearn_version') != sklearn.__version__:
+        print(f"⚠ Model '{name}' v{version} was saved with scikit-learn {metadata.get('sklearn_version')}, "
+              f"running {sklearn.__version__}")
+    return joblib.load(os.path.join(folder, MODEL_FILE)), metadata
@@ -0,0 +1,239 @@
+"""
+Ghép tên cầu thủ giữa hai nguồn (fbref và trang giá trị chuyển nhượng) khi tên không trùng khớp hoàn toàn:
+dấu, tên viết tắt, thứ tự họ tên, cách phiên âm khác nhau.
+
+Khoá chuẩn hoá: bỏ dấu, chữ thường, bỏ ký tự đặc biệt, sắp xếp các từ.
+Độ giống: hệ số Dice trên tập trigram ký tự, tính cho mọi cặp có chung ít nhất một trigram
+bằng một phép nhân ma trận thưa (chỉ các cặp chung trigram mới tốn chi phí).
+Khi ghép trên toàn bộ danh sách, chỉ xét các cặp có chung tiền tố 2 ký tự của ít nhất một từ
+(chặn theo tiền tố), để chi phí không tăng theo tích số tên hai bên.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DEFAULT_THRESHOLD = 0.6
+# Các chữ cái không tách dấu được bằng NFKD
+TRANSLITERATION = str.maketrans({'ø': 'o', 'Ø': 'O', 'ß': 'ss', 'æ': 'ae', 'Æ': 'AE', 'đ': 'd', 'Đ': 'D',
+                                 'ł': 'l', 'Ł': 'L', 'ı': 'i', 'œ': 'oe', 'Œ': 'OE', 'þ': 'th'})
+
+
+# ==== Khoá chuẩn hoá: 'Martin Ødegaard' -> 'martin odegaard', 'Son Heung-min' -> 'heung min son' ====
+def name_tokens(name):
+    if not isinstance(name, str):
+        return []
+    text = unicodedata.normalize('NFKD', name.translate(TRANSLITERATION))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return ''.join(ch if ch.isalnum() else ' ' for ch in text).split()
+
+
+def normalize_key(name):
+    return ' '.join(sorted(name_tokens(name)))
+
+
+def normalize_keys(names):
+    return np.array([normalize_key(name) for name in names], dtype=object)
+
+
+# ==== Khoá viết tắt: 'Gabriel Jesus' và 'G. Jesus' -> 'g jesus' (giữ nguyên từ cuối) ====
+def initials_key(name):
+    tokens = name_tokens(name)
+    return ' '.join(sorted([token[0] for token in tokens[:-1]] + tokens[-1:]))
+
+
+def initials_lookup(initials, rows):
+    """
+    {khoá viết tắt: vị trí} cho các dòng `rows`, bỏ các khoá trùng nhau (không biết chọn ai).
+    """
+    positions = {}
+    for i in rows:
+        key = initials[i]
+        if key:
+            positions[key] = -1 if key in positions else i
+    return {key: i for key, i in positions.items() if i >= 0}
+
+
+# ==== Ma trận trigram (dòng = tên, cột = trigram) ====
+def trigram_matrix(keys, vocab):
+    """
+    `vocab` {trigram: cột} dùng chung giữa hai bên và được bổ sung khi gặp trigram mới.
+    """
+    rows, cols = [], []
+    for row, key in enumerate(keys):
+        padded = f"  {key} "
+        for gram in {padded[i:i + 3] for i in range(len(padded) - 2)}:
+            rows.append(row)
+            cols.append(vocab.setdefault(gram, len(vocab)))
+    data = np.ones(len(rows), dtype=np.float32)
+    return rows, cols, data
+
+
+# ==== Ma trận tiền tố từ (dòng = tên, cột = 2 ký tự đầu của một từ) để chặn các cặp ====
+def prefix_matrix(keys, vocab):
+    rows, cols = [], []
+    for row, key in enumerate(keys):
+        for prefix in {token[:2] for token in key.split()}:
+            rows.append(row)
+            cols.append(vocab.setdefault(prefix, len(vocab)))
+    return rows, cols, np.ones(len(rows), dtype=np.float32)
+
+
+def blocked_pairs(query_keys, candidate_keys):
+    """
+    Các cặp (truy vấn, ứng viên) có chung tiền tố của ít nhất một từ.
+    """
+    vocab = {}
+    q_rows, q_cols, q_data = prefix_matrix(query_keys, vocab)
+    c_rows, c_cols, c_data = prefix_matrix(candidate_keys, vocab)
+    queries = sparse.csr_matrix((q_data, (q_rows, q_cols)), shape=(len(query_keys), len(vocab)))
+    candidates = sparse.csr_matrix((c_data, (c_rows, c_cols)), shape=(len(candidate_keys), len(vocab)))
+    pairs = (queries @ candidates.T).tocoo()
+    return pairs.row, pairs.col
+
+
+def best_matches(query_keys, candidate_keys, blocked=False):
+    """
+    Với mỗi khoá trong `query_keys`: vị trí khoá giống nhất trong `candidate_keys` và hệ số Dice.
+    `blocked=True`: chỉ xét các cặp có chung tiền tố từ (xem blocked_pairs).
+    Trả về (mảng vị trí, -1 nếu không có trigram chung; mảng điểm).
+    """
+    best = np.full(len(query_keys), -1, dtype=np.intp)
+    score = np.zeros(len(query_keys))
+    if len(query_keys) == 0 or len(candidate_keys) == 0:
+        return best, score
+
+    vocab = {}
+    q_rows, q_cols, q_data = trigram_matrix(query_keys, vocab)
+    c_rows, c_cols, c_data = trigram_matrix(candidate_keys, vocab)
+    queries = sparse.csr_matrix((q_data, (q_rows, q_cols)), shape=(len(query_keys), len(vocab)))
+    candidates = sparse.csr_matrix((c_data, (c_rows, c_cols)), shape=(len(candidate_keys), len(vocab)))
+
+    if blocked:
+        # Số trigram chung chỉ tính cho các cặp cùng khối
+        pair_rows, pair_cols = blocked_pairs(query_keys, candidate_keys)
+        counts = np.asarray(queries[pair_rows].multiply(candidates[pair_cols]).sum(axis=1)).ravel()
+        keep = counts > 0
+        pair_rows, pair_cols, counts = pair_rows[keep], pair_cols[keep], counts[keep]
+    else:
+        shared = (queries @ candidates.T).tocoo()
+        pair_rows, pair_cols, counts = shared.row, shared.col, shared.data
+    q_size = np.asarray(queries.sum(axis=1)).ravel()
+    c_size = np.asarray(candidates.sum(axis=1)).ravel()
+    dice = 2 * counts / (q_size[pair_rows] + c_size[pair_cols])
+
+    # Điểm cao nhất của từng dòng: sắp theo (dòng, -điểm) rồi lấy phần tử đầu mỗi dòng
+    order = np.lexsort((-dice, pair_rows))
+    rows, first = np.unique(pair_rows[order], return_index=True)
+    best[rows] = pair_cols[order][first]
+    score[rows] = dice[order][first]
+    return best, score
+
+
+# ==== Ghép hai danh sách tên ====
+def match_names(names, listing_names, teams=None, listing_teams=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Ghép mỗi tên trong `names` với một tên trong `listing_names`, theo thứ tự ưu tiên:
+    trùng khớp hoàn toàn, trùng khoá chuẩn hoá, giống nhất trong cùng đội (nếu hai bên đều có đội),
+    giống nhất trong toàn bộ danh sách (chặn theo tiền tố từ, một lượt). Chỉ nhận kết quả mờ có điểm >= `threshold`.
+    Mỗi dòng của danh sách chỉ được ghép cho một tên: bước sau không xét các dòng đã ghép,
+    nhiều tên cùng chọn một dòng thì tên có điểm cao nhất được giữ, các tên còn lại chuyển sang bước sau.
+    Tên thua tranh chấp có Method 'collision' (không ghép được) hoặc '<bước> (collision)' (ghép với dòng khác).
+    Trả về DataFrame báo cáo: Name, Team, Match, Listing Team, Score, Method, Listing Row (-1 = không ghép được).
+    """
+    names = pd.Series(list(names), dtype=object)
+    listing_names = pd.Series(list(listing_names), dtype=object)
+    listing_teams = pd.Series(list(listing_teams), dtype=object) if listing_teams is not None else None
+    keys = normalize_keys(names)
+    listing_keys = normalize_keys(listing_names)
+
+    match = np.full(len(names), -1, dtype=np.intp)
+    score = np.zeros(len(names))
+    method = np.full(len(names), 'none', dtype=object)
+    taken = np.zeros(len(listing_names), dtype=bool)
+    collided = np.zeros(len(names), dtype=bool)
+
+    def claim(queries, rows, scores, label):
+        """
+        Ghép `queries[i]` với dòng `rows[i]` (-1 = không có). Dòng đã ghép ở bước trước bị bỏ qua;
+        nhiều tên cùng chọn một dòng thì giữ tên điểm cao nhất (bằng điểm: tên đứng trước). Trả về số tên được ghép.
+        """
+        free = rows >= 0
+        collided[queries[free & taken[np.maximum(rows, 0)]]] = True
+        free &= ~taken[np.maximum(rows, 0)]
+        queries, rows, scores = queries[free], rows[free], scores[free]
+        order = np.lexsort((-scores, rows))
+        _, first = np.unique(rows[order], return_index=True)
+        won = np.zeros(len(rows), dtype=bool)
+        won[order[first]] = True
+        collided[queries[~won]] = True
+        match[queries[won]], score[queries[won]], method[queries[won]] = rows[won], scores[won], label
+        taken[rows[won]] = True
+        return int(won.sum())
+
+    # 1-2. Trùng tên hoặc trùng khoá chuẩn hoá (tra bảng băm; tên trùng nhau lấy lần lượt các dòng còn trống)
+    for label, values, lookup in (('exact', names, listing_names), ('normalized', keys, listing_keys)):
+        position = {}
+        for i, value in enumerate(lookup):
+            position.setdefault(value, []).append(i)
+        for i in np.flatnonzero((match < 0) & (keys != '')):
+            rows = [row for row in position.get(values[i], []) if not taken[row]]
+            if rows:
+                match[i], score[i], method[i] = rows[0], 1.0, label
+                taken[rows[0]] = True
+            elif values[i] in position:
+                collided[i] = True
+
+    # 2b. Tên viết tắt ở một trong hai bên ('G. Jesus' ~ 'Gabriel Jesus'), chỉ khi không nhập nhằng
+    name_initials = np.array([initials_key(name) for name in names], dtype=object)
+    listing_initials = np.array([initials_key(name) for name in listing_names], dtype=object)
+    abbreviated = name_initials == keys
+    listing_abbreviated = listing_initials == listing_keys
+    full_lookup = initials_lookup(listing_initials, range(len(listing_initials)))
+    short_lookup = initials_lookup(listing_initials, np.flatnonzero(listing_abbreviated))
+    found = np.array([(full_lookup if short else short_lookup).get(key, -1)
+                      for key, short in zip(name_initials, abbreviated)], dtype=np.intp)
+    queries = np.flatnonzero((match < 0) & (keys != ''))
+    claim(queries, found[queries], np.full(len(queries), 0.9), 'initials')
+
+    # 3. Mờ trong cùng đội: ghép tên đội hai nguồn trước (ví dụ 'Manchester Utd' ~ 'Manchester United')
+    if teams is not None and listing_teams is not None:
+        team_keys = normalize_keys(teams)
+        listing_team_keys = normalize_keys(listing_teams)
+        unique_listing_teams = np.unique(listing_team_keys)
+        unique_teams = np.unique(team_keys)
+        team_best, team_score = best_matches(unique_teams, unique_listing_teams)
+        team_map = {team: unique_listing_teams[b] for team, b, s in zip(unique_teams, team_best, team_score)
+                    if b >= 0 and s >= 0.5 and team != ''}
+
+        for team, listing_team in team_map.items():
+            queries = np.flatnonzero((team_keys == team) & (match < 0))
+            block = np.flatnonzero((listing_team_keys == listing_team) & ~taken)
+            if len(queries) == 0 or len(block) == 0:
+                continue
+            best, best_score = best_matches(keys[queries], listing_keys[block])
+            hit = (best >= 0) & (best_score >= threshold)
+            claim(queries, np.where(hit, block[best], -1), best_score, 'fuzzy-team')
+
+    # 4. Mờ trên các dòng còn trống cho các tên còn lại, chỉ các cặp chung tiền tố từ, một lượt
+    queries = np.flatnonzero(match < 0)
+    candidates = np.flatnonzero(~taken)
+    if len(queries) and len(candidates):
+        best, best_score = best_matches(keys[queries], listing_keys[candidates], blocked=True)
+        hit = (best >= 0) & (best_score >= threshold)
+        claim(queries, np.where(hit, candidates[best], -1), best_score, 'fuzzy')
+
+    method[collided & (match < 0)] = 'collision'
+    method[collided & (match >= 0)] += ' (collision)'
+
+    # Vị trí -1 (không ghép được) không có trong index nên reindex trả về giá trị thiếu
+    return pd.DataFrame({
+        'Name': names,
+        'Team': list(teams) if teams is not None else None,
+        'Match': listing_names.reindex(match).to_numpy(),
+        'Listing Team': listing_teams.reindex(match).to_numpy() if listing_teams is not None else None,
+        'Score': np.round(score, 3),
+        'Method': method,
+        'Listing Row': match,
+    })
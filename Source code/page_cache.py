@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+
+CACHE_DIR = '.page_cache'
+DEFAULT_TTL = 24 * 3600              # Trang còn "mới" trong 1 ngày
+DEFAULT_MAX_AGE = 30 * 24 * 3600     # Sau 30 ngày thì xoá hẳn
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+class CacheMiss(KeyError):
+    """
+    Không có trang `url` trong cache (dùng ở chế độ --offline).
+    """
+    def __init__(self, url):
+        super().__init__(url)
+        self.url = url
+
+    def __str__(self):
+        return f"Not in cache: {self.url}"
+
+
+# ==== Cache HTML trên đĩa: URL -> HTML nén + thời điểm tải + validators ====
+class PageCache:
+    """
+    Mỗi URL được lưu bằng khoá sha256 của nó: `<key>.html.gz` chứa HTML nén,
+    `<key>.json` chứa url, fetched_at, etag, last_modified.
+    Thời điểm truy cập (mtime của file .json) dùng cho việc xoá theo LRU.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, max_age=DEFAULT_MAX_AGE,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        folder = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(folder, key + '.html.gz'), os.path.join(folder, key + '.json')
+
+    def get(self, url):
+        """
+        Trả về dict {'url', 'html', 'fetched_at', 'etag', 'last_modified'} hoặc None.
+        """
+        html_path, meta_path = self._paths(url)
+        if not (os.path.exists(html_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        with gzip.open(html_path, 'rt', encoding='utf-8') as f:
+            entry['html'] = f.read()
+        os.utime(meta_path)
+        return entry
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry['fetched_at'] < self.ttl
+
+    def validators(self, entry):
+        """
+        Header cho request có điều kiện (trả về 304 nếu trang không đổi).
+        """
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, html, etag=None, last_modified=None):
+        html_path, meta_path = self._paths(url)
+        os.makedirs(os.path.dirname(html_path), exist_ok=True)
+        with gzip.open(html_path, 'wt', encoding='utf-8') as f:
+            f.write(html)
+        meta = {'url': url, 'fetched_at': time.time(), 'etag': etag, 'last_modified': last_modified}
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def evict(self):
+        """
+        Xoá các trang quá `max_age`, sau đó xoá các trang ít dùng nhất
+        cho tới khi tổng dung lượng nhỏ hơn `max_bytes`.
+        """
+        entries = []
+        now = time.time()
+        for folder, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                meta_path = os.path.join(folder, name)
+                html_path = meta_path[:-len('.json')] + '.html.gz'
+                try:
+                    with open(meta_path, 'r', encoding='utf-8') as f:
+                        fetched_at = json.load(f)['fetched_at']
+                    size = os.path.getsize(meta_path) + os.path.getsize(html_path)
+                    accessed = os.path.getmtime(meta_path)
+                except (OSError, ValueError, KeyError):
+                    fetched_at, size, accessed = 0, 0, 0
+                entries.append((accessed, fetched_at, size, meta_path, html_path))
+
+        total = sum(size for _, _, size, _, _ in entries)
+        removed = 0
+        for accessed, fetched_at, size, meta_path, html_path in sorted(entries):
+            if now - fetched_at <= self.max_age and total <= self.max_bytes:
+                continue
+            for path in (meta_path, html_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # Tiến trình khác đã xoá
+            total -= size
+            removed += 1
+        return removed
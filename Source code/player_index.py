@@ -0,0 +1,162 @@
+"""
+Tìm cầu thủ tương tự: index láng giềng gần nhất trên ma trận chỉ số đã chuẩn hoá của BTL_3.
+
+Index được dựng và lưu mỗi lần chạy BTL_3 (chế độ fit). Cách dùng:
+    python "Source code/player_index.py" "Mohamed Salah" "Bukayo Saka" --top 5 --position FW --min-minutes 900
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_store import load_artifact, save_artifact
+
+INDEX_ROOT = os.path.join('REPORT_BTL', 'BTL3_File', 'models')
+INDEX_NAME = 'player_index'
+INFO_COLUMNS = ['player_id', 'Name', 'Team', 'Position', 'Minutes', 'Competition', 'Season']
+BLOCK_BYTES = 64 * 1024 * 1024  # bộ nhớ tối đa cho ma trận khoảng cách của một khối truy vấn
+
+
+# ==== Index láng giềng gần nhất (brute force chính xác, theo khối) ====
+class PlayerIndex:
+    """
+    Giữ ma trận chỉ số đã chuẩn hoá (float32) cùng bình phương chuẩn của từng dòng,
+    và bảng thông tin cầu thủ để lọc theo vị trí / số phút.
+    Khoảng cách Euclid được tính theo khối truy vấn: |q|² + |x|² - 2 q·x.
+    """
+    def __init__(self, vectors, players):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        self.players = players.reset_index(drop=True)
+
+    @classmethod
+    def from_frame(cls, df, scaled_data):
+        """
+        `df` là bảng cầu thủ (cùng thứ tự dòng với `scaled_data`).
+        """
+        df = df.reset_index()
+        players = df[[name for name in INFO_COLUMNS if name in df.columns]].copy()
+        return cls(scaled_data, players)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def find_rows(self, names):
+        """
+        Vị trí các dòng có tên trùng (không phân biệt hoa thường) với từng tên trong `names`.
+        """
+        lowered = self.players['Name'].astype(str).str.lower()
+        rows = []
+        for name in names:
+            matches = np.flatnonzero((lowered == name.lower()).to_numpy())
+            if len(matches) == 0:
+                raise KeyError(f"Player not in index: {name}")
+            rows.extend(matches)
+        return np.asarray(rows, dtype=np.intp)
+
+    def filter_mask(self, position=None, min_minutes=None):
+        mask = np.ones(len(self), dtype=bool)
+        if position:
+            # Vị trí fbref có thể là 'FW,MF'
+            mask &= self.players['Position'].astype(str).str.contains(position, regex=False).to_numpy()
+        if min_minutes is not None:
+            mask &= (self.players['Minutes'] >= min_minutes).fillna(False).to_numpy(dtype=bool)
+        return mask
+
+    def query(self, rows, n=10, position=None, min_minutes=None, block_size=None):
+        """
+        Top-`n` cầu thủ gần nhất cho mỗi dòng trong `rows` (không tính chính nó),
+        chỉ xét các cầu thủ thoả bộ lọc. Trả về DataFrame, mỗi dòng là một cặp (truy vấn, kết quả).
+        Mặc định mỗi khối có khoảng BLOCK_BYTES / (8·N) truy vấn (N = số cầu thủ thoả bộ lọc).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        candidates = np.flatnonzero(self.filter_mask(position, min_minutes))
+        k = min(n + 1, len(candidates))
+        if k == 0:
+            return pd.DataFrame()
+        vectors, norms = self.vectors[candidates], self.norms[candidates]
+        if block_size is None:
+            block_size = max(1, BLOCK_BYTES // (8 * len(candidates)))
+
+        # Xếp hạng theo vị trí truy vấn: một dòng có thể được truy vấn nhiều lần
+        positions, result_rows, distances = [], [], []
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            dist2 = self.norms[block][:, None] + norms[None, :] - 2 * (self.vectors[block] @ vectors.T)
+            dist2[candidates[None, :] == block[:, None]] = np.inf
+
+            top = np.argpartition(dist2, k - 1, axis=1)[:, :k] if k < len(candidates) else \
+                np.broadcast_to(np.arange(len(candidates)), (len(block), len(candidates)))
+            top_dist = np.take_along_axis(dist2, top, axis=1)
+            order = np.argsort(top_dist, axis=1, kind='stable')[:, :n]
+            top = np.take_along_axis(top, order, axis=1)
+            top_dist = np.take_along_axis(top_dist, order, axis=1)
+
+            valid = np.isfinite(top_dist)
+            positions.append(np.repeat(np.arange(start, start + len(block)), valid.sum(axis=1)))
+            result_rows.append(candidates[top[valid]])
+            distances.append(np.sqrt(np.maximum(top_dist[valid], 0)))
+
+        positions = np.concatenate(positions)
+        queries = self.players[[name for name in ('Name', 'Team') if name in self.players.columns]]
+        queries = queries.iloc[rows[positions]].reset_index(drop=True)
+        queries.columns = ['Query' if name == 'Name' else f"Query {name}" for name in queries.columns]
+        queries['Rank'] = queries.groupby(positions).cumcount() + 1
+
+        result = pd.concat([queries, self.players.iloc[np.concatenate(result_rows)].reset_index(drop=True)], axis=1)
+        result['Distance'] = np.concatenate(distances)
+        return result
+
+    def similar(self, names, n=10, position=None, min_minutes=None):
+        return self.query(self.find_rows(names), n, position, min_minutes)
+
+
+# ==== Lưu / nạp index ====
+def save_index(index, metadata, root=INDEX_ROOT):
+    version, folder = save_artifact(INDEX_NAME, {'index': index}, metadata, root)
+    print(f"Saved similar-player index v{version} ({len(index)} players) to {folder}")
+    return version
+
+
+def load_index(version=None, root=INDEX_ROOT):
+    objects, metadata = load_artifact(INDEX_NAME, version, root)
+    return objects['index'], metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the most similar players in the clustering feature space')
+    parser.add_argument('names', nargs='*', help='Player names to query')
+    parser.add_argument('--names-file', help='File with one player name per line')
+    parser.add_argument('--top', type=int, default=10, help='Number of similar players per query')
+    parser.add_argument('--position', help="Only return players whose position contains this (e.g. 'FW')")
+    parser.add_argument('--min-minutes', type=float, help='Only return players with at least this many minutes')
+    parser.add_argument('--version', type=int, help='Index version (default: latest)')
+    parser.add_argument('--output', help='Write the results to this CSV file instead of printing them')
+    args = parser.parse_args()
+
+    names = list(args.names)
+    if args.names_file:
+        with open(args.names_file, 'r', encoding='utf-8') as f:
+            names += [line.strip() for line in f if line.strip()]
+    if not names:
+        parser.error('give at least one player name or --names-file')
+
+    index, metadata = load_index(args.version)
+    rows = index.find_rows(names)
+
+    start = time.perf_counter()
+    result = index.query(rows, args.top, args.position, args.min_minutes)
+    elapsed = time.perf_counter() - start
+    print(f"{len(rows)} queries on index v{metadata['version']} in {elapsed * 1000:.2f} ms "
+          f"({elapsed * 1e6 / len(rows):.0f} µs/query)")
+
+    if args.output:
+        result.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"✅ Saved to {args.output}")
+    else:
+        print(result.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
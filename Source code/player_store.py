@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from table_schema import CATEGORICAL_COLUMNS, TEXT_COLUMNS
+
+# Các cột giữ dạng chuỗi, các cột còn lại là chỉ số (float64, thiếu = NaN)
+STRING_COLUMNS = set(CATEGORICAL_COLUMNS + TEXT_COLUMNS)
+MISSING = (None, '', 'N/a')
+
+# ==== Đổi chuỗi fbref ('2,430', '81.5', '') sang số ====
+def parse_number(text):
+    if text in MISSING:
+        return np.nan
+    try:
+        return float(text.replace(',', '').strip())
+    except ValueError:
+        return np.nan
+
+
+# ==== Bảng cầu thủ dạng cột, khoá theo id cầu thủ ====
+class PlayerStore:
+    """
+    Lưu dữ liệu cầu thủ theo cột, khoá bằng id `data-append-csv` của fbref.
+    Schema lấy từ danh sách cột MultiIndex: tên cột là phần tử cuối của tuple.
+    Mỗi cột là một mảng cấp phát sẵn (object cho cột chuỗi, float64 cho chỉ số)
+    và số được đổi kiểu ngay khi ghi vào.
+    """
+    def __init__(self, columns, capacity):
+        self.columns = [tuple(col) for col in columns]
+        self.names = [col[-1] for col in self.columns]
+        self.capacity = max(1, capacity)
+        self.index = {}
+        self.arrays = {}
+        for name in self.names:
+            if name in STRING_COLUMNS:
+                self.arrays[name] = np.full(self.capacity, None, dtype=object)
+            else:
+                self.arrays[name] = np.full(self.capacity, np.nan, dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, df, columns):
+        """
+        Dựng lại bảng từ một DataFrame phẳng (ví dụ file Parquet lần trước), index là id cầu thủ.
+        """
+        store = cls(columns, capacity=len(df))
+        for name in store.names:
+            if name not in df.columns:
+                continue
+            values = df[name]
+            if name in STRING_COLUMNS:
+                store.arrays[name][:len(df)] = values.astype(object).where(values.notna(), None).to_numpy()
+            else:
+                store.arrays[name][:len(df)] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+        store.index = {player_id: row for row, player_id in enumerate(df.index)}
+        return store
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, player_id):
+        return player_id in self.index
+
+    def add(self, player_id, values):
+        """
+        Thêm (hoặc ghi đè) một cầu thủ. `values` là dict {tên cột: giá trị thô}.
+        """
+        row = self.index.get(player_id)
+        if row is None:
+            if len(self.index) >= self.capacity:
+                self._grow()
+            row = self.index[player_id] = len(self.index)
+        self._write(row, values)
+
+    def update(self, player_id, values):
+        """
+        Ghi các cột của một cầu thủ đã có. Trả về False nếu id chưa có trong bảng.
+        """
+        row = self.index.get(player_id)
+        if row is None:
+            return False
+        self._write(row, values)
+        return True
+
+    def copy_columns(self, other, names):
+        """
+        Chép các cột `names` từ bảng `other` sang, ghép theo id cầu thủ.
+        Trả về danh sách id không có trong `other`.
+        """
+        shared = [player_id for player_id in self.index if player_id in other.index]
+        missing = [player_id for player_id in self.index if player_id not in other.index]
+        dst = np.fromiter((self.index[player_id] for player_id in shared), dtype=np.intp, count=len(shared))
+        src = np.fromiter((other.index[player_id] for player_id in shared), dtype=np.intp, count=len(shared))
+        for name in names:
+            self.arrays[name][dst] = other.arrays[name][src]
+        return missing
+
+    def _write(self, row, values):
+        for name, value in values.items():
+            array = self.arrays[name]
+            if array.dtype == object:
+                array[row] = None if value in MISSING else value
+            else:
+                array[row] = parse_number(value)
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.full(self.capacity, None if array.dtype == object else np.nan, dtype=array.dtype)
+            grown[:len(array)] = array
+            self.arrays[name] = grown
+
+    def to_frame(self):
+        """
+        DataFrame với cột MultiIndex, index là id cầu thủ.
+        """
+        n = len(self.index)
+        df = pd.DataFrame({name: self.arrays[name][:n] for name in self.names},
+                          index=pd.Index(list(self.index), name='player_id'))
+        df.columns = pd.MultiIndex.from_tuples(self.columns)
+        return df
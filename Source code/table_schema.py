@@ -0,0 +1,271 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from field_parsing import format_counts
+
+# ==== Các field của bảng thống kê chính (trang 'stats') ====
+INFO_FIELDS = [
+    'player', 'nationality', 'team', 'position', 'age',
+    'games', 'games_starts', 'minutes', 'goals', 'assists',
+    'cards_yellow', 'cards_red', 'xg', 'xg_assist',
+    'progressive_carries', 'progressive_passes', 'progressive_passes_received',
+    'goals_per90', 'assists_per90', 'xg_per90', 'xg_assist_per90'
+]
+
+# ==== Các bảng phụ: (tên trang fbref, fields) ====
+SECTIONS = [
+    ('keepers',
+    ['gk_goals_against_per90', 'gk_save_pct', 'gk_clean_sheets_pct', 'gk_pens_save_pct']),
+    ('shooting',
+    ['shots_on_target_pct', 'shots_on_target_per90', 'goals_per_shot', 'average_shot_distance']),
+    ('passing',
+    ['passes_completed', 'passes_pct', 'passes_total_distance',
+    'passes_pct_short', 'passes_pct_medium', 'passes_pct_long',
+    'assisted_shots', 'passes_into_final_third', 'passes_into_penalty_area',
+    'crosses_into_penalty_area', 'progressive_passes']),
+    ('gca',
+    ['sca', 'sca_per90', 'gca', 'gca_per90']),
+    ('defense',
+    ['tackles', 'tackles_won', 'challenges', 'challenges_lost',
+     'blocks', 'blocked_shots', 'blocked_passes', 'interceptions']),
+    ('possession',
+    ['touches', 'touches_def_pen_area', 'touches_def_3rd', 'touches_mid_3rd',
+    'touches_att_3rd', 'touches_att_pen_area', 'take_ons', 'take_ons_won',
+    'take_ons_tackled', 'carries', 'carries_progressive_distance',
+    'progressive_carries', 'carries_into_final_third', 'carries_into_penalty_area',
+    'miscontrols', 'dispossessed', 'passes_received', 'progressive_passes_received']),
+    ('misc',
+    ['fouls', 'fouled', 'offsides', 'crosses',
+     'ball_recoveries', 'aerials_won', 'aerials_lost', 'aerials_won_pct']),
+]
+
+# ==== Cột MultiIndex (Chuyên mục, Nhóm, Tên cột) ====
+COLUMNS = [
+('','' ,'Name'),
+('', '','Nation' ),
+('', '', 'Team'),
+('', '', 'Position' ),
+('', '', 'Age'),
+('', 'Playing Time', 'Matches played'),
+('', '', 'Starts'),
+('', '', 'Minutes'),
+('', 'Performance', 'Goals'),
+('', '', 'Assists'),
+('', '', 'Yellow Cards'),
+('', '', 'Red Cards'),
+('', 'Expected', 'xG'),
+('', '', 'xAG'),
+('', 'Progression', 'Prg Carries'),
+('', '', 'Prg Passes'),
+('', '', 'Prg Passes Rec'),
+('', 'Per 90 Minutes', 'Goals/90'),
+('', '', 'Assists/90'),
+('', '', 'xG/90'),
+('', '', 'xGA/90'),
+('Goalkeeping', 'Performance', 'GA90'),
+('', '', 'Save%'),
+('', '', 'CS%'),
+('', 'Penalty Kicks', 'PK_Save%'),
+('Shooting','Standard', 'SoT%'),
+('','','Sot/90'),
+('','', 'G/sh'),
+('','', 'Shoot_Dist'),
+('Passing','Total', 'Passes Completed (Cmp)'),
+('','', 'Cmp%'),
+('','', 'Total Dist'),
+('','Short', 'Short_Cmp%'),
+('','Medium', 'Medium_Cmp%'),
+('','Long', 'Long_Cmp%'),
+('','Expected', 'Key Passes'),
+('','', 'Pass 1/3'),
+('','', 'Pass PA'),
+('','', 'Cross PA'),
+('','', 'Prg Passes (Pass)'),
+('Goal and Shot Creation','SCA', 'Shot-Creating Actions (SCA)'),
+('','', 'SCA90'),
+('','GCA', 'Goal-Creating Actions (GCA)'),
+('','', 'GCA90'),
+('Defensive','Tackles', 'Tkl'),
+('','', 'Tkl Won'),
+('','Challenges', 'Dribbles Challenged (Att)'),
+('','', 'Challenges Lost'),
+('','Blocks', 'Blocks'),
+('','', 'Shots Blocked'),
+('','', 'Pass Blocked'),
+('','', 'Interceptions'),
+('Possession','Touches', 'Touches'),
+('','', 'Def_Pen'),
+('','', 'Def_3rd'),
+('','', 'Mid_3rd'),
+('','', 'Att_3rd'),
+('','', 'Att_Pen'),
+('','Take-Ons', 'Attempted'),
+('','', 'Successful %'),
+('','', 'Tkld%'),
+('','Carries', 'Carries'),
+('','', 'PrgDist'),
+('','', 'PrgC (Poss)'),
+('','', 'Carries_1/3'),
+('','', 'Carries_CPA'),
+('','', 'Miscontrols'),
+('','', 'Dispossessed'),
+('','Receiving', 'Passes Rec'),
+('','', 'Prg Rec (Poss)'),
+(' Miscellaneous','Performance', 'Fouls Committed'),
+('','', 'Fouls Drawn'),
+('','', 'Offsides'),
+('','', 'Crosses'),
+('','', 'Recov'),
+('','Aerial Duels', 'Aerials Won'),
+('','', 'Aerials Lost'),
+('','', 'Aerials Won%')
+]
+
+# ==== Kiểu dữ liệu của từng cột ====
+CATEGORICAL_COLUMNS = ['Nation', 'Team', 'Position']
+TEXT_COLUMNS = ['Name', 'Age']
+ID_COLUMN = 'player_id'
+
+# ==== Số chữ số thập phân fbref hiển thị (dùng khi ghi file CSV cũ, các cột khác là số nguyên) ====
+CSV_DECIMALS = {
+    'xG': 1, 'xAG': 1,
+    'Goals/90': 2, 'Assists/90': 2, 'xG/90': 2, 'xGA/90': 2,
+    'GA90': 2, 'Save%': 1, 'CS%': 1, 'PK_Save%': 1,
+    'SoT%': 1, 'Sot/90': 2, 'G/sh': 2, 'Shoot_Dist': 1,
+    'Cmp%': 1, 'Short_Cmp%': 1, 'Medium_Cmp%': 1, 'Long_Cmp%': 1,
+    'SCA90': 2, 'GCA90': 2,
+    'Aerials Won%': 1,
+}
+METADATA_KEY = b'btl.columns'
+
+
+# ==== Đổi bảng dữ liệu (cột MultiIndex) sang bảng có kiểu rõ ràng ====
+def to_typed_frame(df):
+    """
+    Làm phẳng cột MultiIndex thành tên cột, cột phân loại dùng 'category',
+    các chỉ số là float64 với NaN cho giá trị thiếu.
+    """
+    typed = df.copy()
+    typed.columns = [col[-1] if isinstance(col, tuple) else col for col in typed.columns]
+    for name in typed.columns:
+        if name in CATEGORICAL_COLUMNS:
+            typed[name] = typed[name].astype('category')
+        elif name in TEXT_COLUMNS:
+            typed[name] = typed[name].astype('string')
+        else:
+            typed[name] = pd.to_numeric(typed[name], errors='coerce').astype('float64')
+    return typed
+
+
+# ==== Định dạng các cột chỉ số trước khi ghi file CSV, giống các file CSV cũ ====
+def format_csv_columns(df, text_columns=None):
+    """
+    Trả về bản sao của `df` (cột phẳng hoặc MultiIndex) sẵn sàng cho `to_csv`.
+    Cột chỉ số có tên trong `text_columns` được ghi đúng như fbref hiển thị: số chữ số thập phân
+    theo CSV_DECIMALS, số nguyên không có '.0', phút có dấu phẩy. Mặc định (None) đó là các cột mà
+    pandas từng đọc từ Table_EPL.csv thành chuỗi: cột có giá trị thiếu và cột phút;
+    các cột chỉ số khác được ghi như số (số nguyên không có '.0'). Giá trị thiếu ghi là 'N/a'.
+    """
+    stat_names = {col[-1] for col in COLUMNS} - set(CATEGORICAL_COLUMNS + TEXT_COLUMNS)
+    result = df.copy()
+    for col in result.columns:
+        name = col[-1] if isinstance(col, tuple) else col
+        if name not in stat_names or not pd.api.types.is_float_dtype(result[col]):
+            continue
+
+        # float32 của loader: làm tròn về đúng giá trị fbref trước khi đổi sang float64
+        values = pd.Series(np.round(result[col].to_numpy(dtype=np.float64), CSV_DECIMALS.get(name, 6)),
+                           index=result.index)
+        as_text = name in text_columns if text_columns is not None else (values.isna().any() or name == 'Minutes')
+        if as_text and name == 'Minutes':
+            result[col] = format_counts(values).to_numpy()
+        elif as_text and name in CSV_DECIMALS:
+            result[col] = values.map(f"{{:.{CSV_DECIMALS[name]}f}}".format, na_action='ignore').astype(object)
+        elif values.dropna().mod(1).eq(0).all():
+            result[col] = values.astype('Int64').astype(object)
+        else:
+            result[col] = values
+    return result.astype(object).where(result.notna(), 'N/a')
+
+
+# ==== Ghi file Parquet, lưu cấu trúc chuyên mục vào metadata ====
+def write_parquet(df, path):
+    """
+    `df` có index là id cầu thủ. Cấu trúc 3 tầng của cột được lưu trong
+    metadata của schema dưới khoá 'btl.columns'.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    typed = to_typed_frame(df)
+    typed.index.name = ID_COLUMN
+    table = pa.Table.from_pandas(typed.reset_index(), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps([list(col) for col in COLUMNS]).encode('utf-8')
+    pq.write_table(table.replace_schema_metadata(metadata), path)
+
+
+# ==== Đọc bảng đã xuất: file Parquet có kiểu, index các shard, hoặc file CSV cũ ====
+def read_table(path, competitions=None, seasons=None):
+    """
+    File .parquet: đọc thẳng (memory-map), index là id cầu thủ.
+    File index.json của các shard: chỉ đọc các shard thuộc `competitions`/`seasons`.
+    File .csv cũ: đọc dòng tiêu đề thứ 3 như trước, chưa ép kiểu.
+    """
+    if path.endswith('.json'):
+        return read_shards(path, competitions, seasons)
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, memory_map=True)
+        if ID_COLUMN in df.columns:
+            df = df.set_index(ID_COLUMN)
+        return df
+    return pd.read_csv(path, header=2)
+
+
+# ==== Các shard (giải đấu, mùa giải) được chọn trong file index ====
+def select_shards(index_path, competitions=None, seasons=None):
+    """
+    Trả về danh sách (entry trong index, đường dẫn file shard).
+    """
+    with open(index_path, 'r', encoding='utf-8') as f:
+        shards = json.load(f)['shards']
+    folder = os.path.dirname(index_path)
+
+    selected = []
+    for entry in shards:
+        if competitions and entry['competition'] not in competitions:
+            continue
+        if seasons and entry['season'] not in seasons:
+            continue
+        selected.append((entry, os.path.join(folder, entry['path'])))
+    if not selected:
+        raise ValueError(f"No shard in {index_path} matches competitions={competitions} seasons={seasons}")
+    return selected
+
+
+# ==== Đọc và gộp các shard (giải đấu, mùa giải) được chọn ====
+def read_shards(index_path, competitions=None, seasons=None):
+    """
+    Một cầu thủ có thể xuất hiện ở nhiều mùa nên id cầu thủ được giữ thành cột,
+    thêm hai cột 'Competition' và 'Season'.
+    """
+    frames = []
+    for entry, shard_path in select_shards(index_path, competitions, seasons):
+        df = read_table(shard_path).reset_index()
+        df['Competition'] = entry['competition']
+        df['Season'] = entry['season']
+        frames.append(df)
+
+    df = pd.concat(frames, ignore_index=True)
+    for name in CATEGORICAL_COLUMNS + ['Competition', 'Season']:
+        df[name] = df[name].astype('category')
+    return df
+
+
+# ==== Ưu tiên file Parquet nếu có cạnh file CSV ====
+def resolve_table_path(csv_path):
+    parquet_path = csv_path[:-len('.csv')] + '.parquet' if csv_path.endswith('.csv') else csv_path
+    return parquet_path if os.path.exists(parquet_path) else csv_path
@@ -0,0 +1,210 @@
+"""
+Định giá cầu thủ bằng mô hình đã lưu của BTL_4, không cần huấn luyện lại.
+
+Cách dùng:
+    python "Source code/valuation_service.py" score players.csv --output values.csv
+    python "Source code/valuation_service.py" serve --port 8000
+        POST /score  (JSON: danh sách cầu thủ hoặc {"players": [...]}, hoặc CSV với Content-Type: text/csv)
+        GET  /health (phiên bản và schema của mô hình)
+"""
+import argparse
+import io
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from field_parsing import format_prices, parse_age_years, parse_counts
+from loader import load_table
+from model_store import load_artifact
+
+MODEL_ROOT = os.path.join('REPORT_BTL', 'BTL4_File', 'models')
+MODEL_NAME = 'player_valuation'
+
+
+# ==== Mô hình định giá: nạp một lần, dùng cho nhiều lô ====
+class ValuationModel:
+    """
+    Giữ pipeline đã huấn luyện và schema đầu vào (metadata của model_store).
+    `score` kiểm tra và ép kiểu các cột rồi dự đoán cả lô trong một lần gọi.
+    """
+    def __init__(self, pipeline, metadata):
+        self.pipeline = pipeline
+        self.metadata = metadata
+        self.features = metadata['features']
+        self.numeric_features = metadata['numeric_features']
+        # Dự đoán từng lô nhỏ: chạy một luồng tránh chi phí khởi tạo thread pool mỗi request
+        model = pipeline.named_steps['model']
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+
+    @classmethod
+    def load(cls, version=None, root=MODEL_ROOT):
+        objects, metadata = load_artifact(MODEL_NAME, version, root)
+        return cls(objects['pipeline'], metadata)
+
+    def prepare(self, players):
+        """
+        DataFrame đúng cột và kiểu như lúc huấn luyện: tuổi là số năm tròn (cùng hàm `parse_age_years` với BTL_4),
+        số có dấu phẩy được chuyển sang số. Ô có giá trị (khác rỗng / 'N/a') nhưng không đọc được
+        thành số -> ValueError nêu tên cột và dòng.
+        """
+        missing = [name for name in self.features if name not in players.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+
+        X = players[self.features].copy()
+        for name in self.numeric_features:
+            raw = X[name]
+            if name == 'Age':
+                X[name] = parse_age_years(raw).to_numpy()
+            elif not pd.api.types.is_numeric_dtype(raw):
+                X[name] = parse_counts(raw).to_numpy()
+            else:
+                continue
+
+            text = raw.astype('string').str.strip()
+            invalid = (text.notna() & ~text.isin(['', 'N/a']) & X[name].isna()).to_numpy(dtype=bool)
+            if invalid.any():
+                rows = players.index[invalid].tolist()
+                raise ValueError(f"Invalid value in column '{name}' at row(s) {rows[:5]}: "
+                                 f"{raw[invalid].tolist()[:5]}")
+        X['Position'] = X['Position'].astype(str)
+        return X
+
+    def score(self, players):
+        """
+        Trả về DataFrame: Name (nếu có), Predicted value (numeric), Predicted value ('€12.3M').
+        """
+        values = self.pipeline.predict(self.prepare(players))
+        result = pd.DataFrame({'Predicted value (numeric)': values}, index=players.index)
+        result['Predicted value'] = format_prices(values).to_numpy()
+        if 'Name' in players.columns:
+            result.insert(0, 'Name', players['Name'].to_numpy())
+        return result.reset_index(drop=True)
+
+
+# ==== Đọc lô cầu thủ cần định giá ====
+def read_players(path):
+    """
+    CSV phẳng (ví dụ Players_900mins.csv), Table_EPL.csv, file Parquet,
+    file JSON (danh sách bản ghi) hoặc index các shard.
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and 'shards' in data:
+            return load_table(path)
+        return players_from_json(data)
+    if path.endswith('.parquet'):
+        return load_table(path)
+
+    players = pd.read_csv(path)
+    if 'Name' not in players.columns:
+        # Table_EPL.csv có 3 dòng tiêu đề
+        players = load_table(path)
+    return players
+
+
+def players_from_json(data):
+    """
+    Nhận danh sách bản ghi, {"players": [...]} hoặc một bản ghi; dữ liệu khác (5, null, [1, 2]) -> ValueError.
+    """
+    if isinstance(data, dict):
+        data = data.get('players', [data])
+    if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+        raise ValueError('Expected a list of player records or {"players": [...]}')
+    return pd.DataFrame.from_records(data)
+
+
+# ==== HTTP endpoint ====
+def make_handler(model):
+    class ValuationHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False, default=float).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path != '/health':
+                return self.send_json(404, {'error': f"Unknown path {self.path}"})
+            keys = ['version', 'model', 'features', 'positions', 'test_mae', 'created_at']
+            self.send_json(200, {key: model.metadata.get(key) for key in keys})
+
+        def do_POST(self):
+            if self.path != '/score':
+                return self.send_json(404, {'error': f"Unknown path {self.path}"})
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            start = time.perf_counter()
+            try:
+                if self.headers.get('Content-Type', '').startswith('text/csv'):
+                    players = pd.read_csv(io.BytesIO(body))
+                else:
+                    players = players_from_json(json.loads(body))
+                result = model.score(players)
+            except (ValueError, KeyError, TypeError) as error:
+                return self.send_json(400, {'error': str(error)})
+            self.send_json(200, {
+                'model_version': model.metadata['version'],
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+                'predictions': result.to_dict(orient='records'),
+            })
+
+        def log_message(self, format, *args):
+            pass  # Không in mỗi request
+
+    return ValuationHandler
+
+
+def serve(model, host='127.0.0.1', port=8000):
+    server = ThreadingHTTPServer((host, port), make_handler(model))
+    print(f"Serving valuation model v{model.metadata['version']} on http://{host}:{port} (POST /score, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Value players with the saved BTL_4 model')
+    parser.add_argument('--version', type=int, help='Model version (default: latest)')
+    parser.add_argument('--model-dir', default=MODEL_ROOT, help='Directory of saved models')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    score_parser = commands.add_parser('score', help='Score a CSV/Parquet/JSON file of players')
+    score_parser.add_argument('input', help='Players to value')
+    score_parser.add_argument('--output', help='Write predictions to this CSV file instead of printing them')
+
+    serve_parser = commands.add_parser('serve', help='Serve predictions over HTTP')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = ValuationModel.load(args.version, args.model_dir)
+    print(f"Loaded valuation model v{model.metadata['version']} ({model.metadata.get('model')}) "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if args.command == 'serve':
+        serve(model, args.host, args.port)
+        return
+
+    players = read_players(args.input)
+    start = time.perf_counter()
+    result = model.score(players)
+    print(f"Scored {len(result)} players in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if args.output:
+        result.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"✅ Saved to {args.output}")
+    else:
+        print(result.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
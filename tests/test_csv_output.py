@@ -0,0 +1,109 @@
+"""
+Các file CSV ghi từ bảng đã nạp bằng loader phải giống hệt từng byte các file mà code cũ ghi
+(pandas đọc Table_EPL.csv rồi ghi lại): Players_900mins.csv của BTL_4, Table_EPL_Clustered.csv của BTL_3.
+"""
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'Source code')
+TABLE_EPL = os.path.join(os.path.dirname(__file__), os.pardir, 'REPORT_BTL', 'BTL1_File', 'Table_EPL.csv')
+sys.path.insert(0, SOURCE_DIR)
+
+from loader import iter_table_chunks, load_table  # noqa: E402
+from table_schema import format_csv_columns  # noqa: E402
+
+
+# ==== BTL_4 cũ (tham chiếu) ====
+def standardize_age(age_string):
+    try:
+        age, days = map(int, age_string.split('-'))
+        age += days / 365
+        return round(age, 2)
+    except:  # noqa: E722
+        return None
+
+
+def convert_price(price_str):
+    if not isinstance(price_str, str):
+        return None
+    try:
+        if 'M' in price_str:
+            return int(float(price_str.replace('€', '').replace('M', '').strip()) * 1_000_000)
+        elif 'K' in price_str:
+            return int(float(price_str.replace('€', '').replace('K', '').strip()) * 1_000)
+        else:
+            return int(float(price_str.replace('€', '').strip()))
+    except:  # noqa: E722
+        return None
+
+
+def convert_price_to_string(price):
+    if pd.isna(price):
+        return None
+    if price >= 1_000_000:
+        return f"€{price / 1_000_000:.1f}M"
+    elif price >= 1_000:
+        return f"€{price / 1_000:.1f}K"
+    else:
+        return f"€{price}"
+
+
+def old_load_and_filter_data(input_path):
+    df = pd.read_csv(input_path, header=[2])
+    df['Minutes'] = df['Minutes'].str.replace(',', '').apply(pd.to_numeric, errors='coerce')
+    df = df.dropna(subset=['Minutes'])
+    df['Minutes'] = df['Minutes'].astype(int)
+    df['Age'] = df['Age'].apply(standardize_age)
+    df = df.dropna(subset=['Age'])
+    df['Age'] = df['Age'].astype(int)
+    return df[df['Minutes'] > 900]
+
+
+def old_save_filtered_data(df, transfer_values_dict, output_path):
+    df['Transfer values (numeric)'] = df['Name'].map(transfer_values_dict).map(convert_price)
+    df = df.dropna(subset=['Transfer values (numeric)']).copy()
+    df['Transfer values'] = df['Transfer values (numeric)'].apply(convert_price_to_string)
+    df.drop(columns=['Transfer values (numeric)']).to_csv(output_path, index=False, encoding='utf-8-sig')
+
+
+@pytest.fixture
+def table_epl(tmp_path):
+    # Bản sao: loader ghi snapshot vào thư mục cạnh file nguồn
+    path = tmp_path / 'Table_EPL.csv'
+    shutil.copy(TABLE_EPL, path)
+    return str(path)
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return f.read()
+
+
+def test_players_900mins_matches_old_output(table_epl, tmp_path):
+    import BTL_4
+
+    names = pd.read_csv(table_epl, header=2)['Name']
+    # Một vài cầu thủ không có giá trị chuyển nhượng để kiểm tra cả việc lọc
+    transfer_values = {name: f"€{i % 50 + 0.5}M" if i % 7 else None for i, name in enumerate(names)}
+
+    old_save_filtered_data(old_load_and_filter_data(table_epl), transfer_values, tmp_path / 'old.csv')
+    BTL_4.save_filtered_data(BTL_4.load_and_filter_data(table_epl), transfer_values, str(tmp_path / 'new.csv'))
+    assert read_text(tmp_path / 'new.csv') == read_text(tmp_path / 'old.csv')
+
+
+def test_clustered_table_matches_old_output(table_epl):
+    expected = pd.read_csv(table_epl, header=2).to_csv(index=False)
+    assert format_csv_columns(load_table(table_epl)).to_csv(index=False) == expected
+
+
+def test_chunked_table_matches_old_output(table_epl):
+    # Chế độ streaming của BTL_3: các cột có giá trị thiếu được xác định trên toàn bảng
+    chunks = list(iter_table_chunks(table_epl, chunk_size=100))
+    text_columns = {'Minutes'}.union(*(chunk.columns[chunk.isna().any()] for chunk in chunks))
+    written = ''.join(format_csv_columns(chunk, text_columns).to_csv(index=False, header=(i == 0))
+                      for i, chunk in enumerate(chunks))
+    assert written == pd.read_csv(table_epl, header=2).to_csv(index=False)
@@ -0,0 +1,161 @@
+"""
+So sánh field_parsing với các hàm đổi từng giá trị trước đây (giữ nguyên bên dưới làm chuẩn):
+standardize_age, convert_price, convert_price_to_string của BTL_4, cách đọc số có dấu phẩy
+(player_store.parse_number) và cách ghi cột phút của BTL_1.
+Cuối file: đọc Table_EPL.csv bằng loader rồi ghi lại phải ra đúng nội dung file.
+"""
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'Source code'))
+TABLE_EPL = os.path.join(os.path.dirname(__file__), os.pardir, 'REPORT_BTL', 'BTL1_File', 'Table_EPL.csv')
+
+from field_parsing import format_counts, format_prices, parse_ages, parse_counts, parse_prices  # noqa: E402
+from loader import load_table  # noqa: E402
+from table_schema import COLUMNS, format_csv_columns  # noqa: E402
+
+
+# ==== Các hàm cũ (tham chiếu) ====
+def standardize_age(age_string):
+    try:
+        age, days = map(int, age_string.split('-'))
+        age += days / 365
+        return round(age, 2)
+    except:  # noqa: E722
+        return None
+
+
+def convert_price(price_str):
+    if not isinstance(price_str, str):
+        return None
+    try:
+        if 'M' in price_str:
+            return int(float(price_str.replace('€', '').replace('M', '').strip()) * 1_000_000)
+        elif 'K' in price_str:
+            return int(float(price_str.replace('€', '').replace('K', '').strip()) * 1_000)
+        else:
+            return int(float(price_str.replace('€', '').strip()))
+    except:  # noqa: E722
+        return None
+
+
+def convert_price_to_string(price):
+    if pd.isna(price):
+        return None
+    if price >= 1_000_000:
+        return f"€{price / 1_000_000:.1f}M"
+    elif price >= 1_000:
+        return f"€{price / 1_000:.1f}K"
+    else:
+        return f"€{price}"
+
+
+def parse_number(text):
+    if text in (None, '', 'N/a'):
+        return np.nan
+    try:
+        return float(text.replace(',', '').strip())
+    except (AttributeError, ValueError):
+        return np.nan
+
+
+def format_minutes(value):
+    return f"{int(value):,}" if pd.notna(value) else 'N/a'
+
+
+def as_floats(values):
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+def assert_same_numbers(new, old):
+    np.testing.assert_array_equal(new.to_numpy(dtype=float), as_floats(old))
+
+
+# ==== Tuổi ====
+AGE_CASES = ['N/a', '', '27-0', '27', '27-364', ' 27-100 ', '27 - 100', '+27-5', '-27-5', '27--5',
+             '27-100-3', '27-1,00', '1,027-5', 'abc', None, np.nan]
+
+
+def test_parse_ages_edge_cases():
+    old = [standardize_age(value) if isinstance(value, str) else None for value in AGE_CASES]
+    assert_same_numbers(parse_ages(AGE_CASES), old)
+
+
+def test_parse_ages_all_days():
+    ages = [f"{years}-{days}" for years in range(15, 46) for days in range(366)]
+    assert_same_numbers(parse_ages(ages), [standardize_age(age) for age in ages])
+
+
+# ==== Số có dấu phẩy hàng nghìn ====
+COUNT_CASES = ['N/a', '', '0', '81.5', '2,430', '1,234,567', '-5', '-1,234', ' 12 ', '1e3', '12a', None]
+
+
+def test_parse_counts_edge_cases():
+    assert_same_numbers(parse_counts(COUNT_CASES), [parse_number(value) for value in COUNT_CASES])
+
+
+@pytest.mark.parametrize('values', [
+    [0.0, 5.0, 999.0, 1000.0, 2430.0, 12345.0, 1234567.0, np.nan],
+    [-1.0, -999.0, -1000.0, -1234.0, -1234567.0],
+    [2430.7, 999.99, -1234.5, 0.4],
+])
+def test_format_counts(values):
+    assert format_counts(values).tolist() == [format_minutes(value) for value in values]
+
+
+def test_counts_round_trip():
+    values = ['0', '5', '999', '1,000', '2,430', '12,345', '1,234,567', '-1,234', 'N/a']
+    assert format_counts(parse_counts(values)).tolist() == values
+
+
+# ==== Giá trị chuyển nhượng ====
+PRICE_CASES = ['N/a', '', '€.5M', '€1.5M', '€800K', '€500', '€0.5K', '€1.M', '€ 2 M', '€2M ', '€12.345M',
+               '€.5', '1.5', '-€1M', '€-1M', '€-500', '+€1M', '€1e3', '€1,500K', '€1,000', '€1.5m',
+               'M', '€', '€1.5MK', None, np.nan]
+
+
+def test_parse_prices_edge_cases():
+    assert_same_numbers(parse_prices(PRICE_CASES), [convert_price(value) for value in PRICE_CASES])
+
+
+def test_parse_prices_random():
+    rng = np.random.default_rng(0)
+    amounts = rng.uniform(0, 200, 5000)
+    decimals = rng.integers(0, 4, 5000)
+    units = rng.choice(['', 'K', 'M'], 5000)
+    prices = [f"€{amount:.{d}f}{unit}" for amount, d, unit in zip(amounts, decimals, units)]
+    assert_same_numbers(parse_prices(prices), [convert_price(price) for price in prices])
+
+
+@pytest.mark.parametrize('values', [
+    [0.0, 500.0, 999.0, 1000.0, 800000.0, 999999.0, 1000000.0, 1500000.0, 123456789.0, np.nan],
+    [-1.0, -500.0, -1500000.0],
+    [0.5, 999.5, 1049.99, 1250000.5],
+])
+def test_format_prices(values):
+    assert format_prices(values).tolist() == [convert_price_to_string(value) for value in values]
+
+
+def test_prices_round_trip():
+    values = ['€1.5M', '€800.0K', '€500.0', '€0.0', '€120.0M']
+    assert format_prices(parse_prices(values)).tolist() == values
+
+
+# ==== Cả file: Table_EPL.csv -> loader -> ghi lại như BTL_1 ====
+@pytest.mark.parametrize('cached', [False, True])
+def test_loaded_table_writes_same_csv(tmp_path, cached):
+    path = tmp_path / 'Table_EPL.csv'
+    shutil.copy(TABLE_EPL, path)
+    if cached:
+        load_table(str(path))  # lần sau đọc lại từ snapshot parquet
+    df = load_table(str(path), cache=cached)
+
+    written = format_csv_columns(df, text_columns=[col[-1] for col in COLUMNS]).to_csv(index=False)
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        expected = f.read().splitlines()[2:]
+    assert written.splitlines() == expected
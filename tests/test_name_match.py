@@ -0,0 +1,57 @@
+"""
+match_names trên vài nghìn tên tổng hợp: bước ghép mờ toàn cục chỉ xét các cặp chung tiền tố từ.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'Source code'))
+
+from name_match import blocked_pairs, match_names, normalize_keys  # noqa: E402
+
+SYLLABLES = [consonant + vowel for consonant in 'bcdfghjklmnprstvz' for vowel in 'aeiou']
+
+
+def synthetic_names(count, seed=0):
+    rng = np.random.default_rng(seed)
+    names = set()
+    while len(names) < count:
+        first = ''.join(rng.choice(SYLLABLES, rng.integers(2, 4))).title()
+        last = ''.join(rng.choice(SYLLABLES, rng.integers(2, 5))).title()
+        names.add(f"{first} {last}")
+    return sorted(names)
+
+
+def misspell(name, rng):
+    # Đổi một ký tự ở giữa họ: vẫn giữ tiền tố của từng từ
+    first, last = name.split(' ')
+    i = rng.integers(2, len(last))
+    return f"{first} {last[:i]}{'xyz'[i % 3]}{last[i + 1:]}"
+
+
+def test_fuzzy_stage_on_thousands_of_names():
+    rng = np.random.default_rng(1)
+    names = synthetic_names(3000)
+    listing = [misspell(name, rng) for name in names]
+    order = rng.permutation(len(listing))
+
+    start = time.perf_counter()
+    report = match_names(names, [listing[i] for i in order])
+    elapsed = time.perf_counter() - start
+
+    correct = (order[report['Listing Row'].to_numpy()] == np.arange(len(names))) & (report['Listing Row'] >= 0)
+    assert correct.mean() > 0.95
+    assert (report['Method'] == 'fuzzy').mean() > 0.9
+    assert elapsed < 30
+
+
+def test_blocking_keeps_candidate_pairs_small():
+    names = synthetic_names(3000, seed=2)
+    listing = synthetic_names(3000, seed=3)
+    rows, cols = blocked_pairs(normalize_keys(names), normalize_keys(listing))
+    assert len(rows) < 0.1 * len(names) * len(listing)
+    # Mọi cặp trong cùng khối đều có chung tiền tố của ít nhất một từ
+    for i, j in list(zip(rows, cols))[:1000]:
+        assert {token[:2] for token in names[i].lower().split()} & {token[:2] for token in listing[j].lower().split()}
@@ -0,0 +1,56 @@
+"""
+PlayerIndex.query so với tính khoảng cách trực tiếp, kể cả khi một dòng được truy vấn nhiều lần.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'Source code'))
+
+from player_index import PlayerIndex  # noqa: E402
+
+
+def make_index(size=200, dims=8, seed=0):
+    rng = np.random.default_rng(seed)
+    players = pd.DataFrame({
+        'Name': [f"Player {i}" for i in range(size)],
+        'Team': [f"Team {i % 20}" for i in range(size)],
+        'Position': rng.choice(['GK', 'DF', 'MF', 'FW', 'FW,MF'], size),
+        'Minutes': rng.integers(0, 3000, size).astype(float),
+    })
+    return PlayerIndex(rng.normal(size=(size, dims)), players)
+
+
+def test_query_matches_brute_force():
+    index = make_index()
+    rows = np.array([0, 5, 17, 199])
+    result = index.query(rows, n=5)
+    vectors = index.vectors.astype(np.float64)
+    for position, row in enumerate(rows):
+        distances = np.linalg.norm(vectors - vectors[row], axis=1)
+        distances[row] = np.inf
+        expected = [f"Player {i}" for i in np.argsort(distances, kind='stable')[:5]]
+        got = result.iloc[position * 5:(position + 1) * 5]
+        assert got['Name'].tolist() == expected
+        assert got['Rank'].tolist() == [1, 2, 3, 4, 5]
+        assert (got['Query'] == f"Player {row}").all()
+
+
+def test_repeated_rows_are_ranked_per_query():
+    index = make_index()
+    result = index.query([3, 3, 8, 3], n=4)
+    assert result['Rank'].tolist() == [1, 2, 3, 4] * 4
+    first = result.iloc[:4].reset_index(drop=True)
+    tm.assert_frame_equal(result.iloc[12:].reset_index(drop=True), first)
+
+
+def test_block_size_does_not_change_result():
+    index = make_index()
+    rows = np.arange(0, 200, 3)
+    expected = index.query(rows, n=6, position='FW', min_minutes=500)
+    for block_size in (1, 7, 1000):
+        tm.assert_frame_equal(index.query(rows, n=6, position='FW', min_minutes=500, block_size=block_size),
+                              expected)
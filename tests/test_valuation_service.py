@@ -0,0 +1,89 @@
+"""
+ValuationModel.prepare / score và endpoint POST /score với dữ liệu hợp lệ và không hợp lệ.
+"""
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'Source code'))
+
+from valuation_service import ValuationModel, make_handler  # noqa: E402
+
+NUMERIC = ['Age', 'Minutes', 'Goals']
+
+
+@pytest.fixture(scope='module')
+def model():
+    rng = np.random.default_rng(0)
+    train = pd.DataFrame({
+        'Age': rng.integers(18, 36, 50).astype(float),
+        'Minutes': rng.integers(900, 3400, 50).astype(float),
+        'Goals': rng.integers(0, 25, 50).astype(float),
+        'Position': rng.choice(['DF', 'MF', 'FW'], 50),
+    })
+    pipeline = Pipeline([
+        ('prep', ColumnTransformer([('num', SimpleImputer(), NUMERIC),
+                                    ('cat', OneHotEncoder(handle_unknown='ignore'), ['Position'])])),
+        ('model', LinearRegression()),
+    ])
+    pipeline.fit(train, train['Goals'] * 1_000_000)
+    metadata = {'version': 1, 'features': NUMERIC + ['Position'], 'numeric_features': NUMERIC}
+    return ValuationModel(pipeline, metadata)
+
+
+def test_prepare_parses_strings(model):
+    players = pd.DataFrame({'Age': ['27-300', '31', None], 'Minutes': ['2,430', 'N/a', ''],
+                            'Goals': ['5', '0', ' 12 '], 'Position': ['FW', 'DF', 'MF']})
+    X = model.prepare(players)
+    np.testing.assert_array_equal(X['Age'], [27, 31, np.nan])
+    np.testing.assert_array_equal(X['Minutes'], [2430, np.nan, np.nan])
+    np.testing.assert_array_equal(X['Goals'], [5, 0, 12])
+
+
+@pytest.mark.parametrize('column, value', [('Minutes', 'abc'), ('Age', 'old'), ('Goals', '5 goals')])
+def test_prepare_rejects_unparseable_values(model, column, value):
+    players = pd.DataFrame({'Age': ['25-10', '27-300'], 'Minutes': ['1,000', '2,430'],
+                            'Goals': ['1', '2'], 'Position': ['FW', 'MF']})
+    players.loc[1, column] = value
+    with pytest.raises(ValueError, match=rf"column '{column}' at row\(s\) \[1\]"):
+        model.prepare(players)
+
+
+def test_score_endpoint_returns_400_for_garbage(model):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(model))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/score"
+
+    def post(players):
+        request = urllib.request.Request(url, json.dumps(players).encode('utf-8'),
+                                         {'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as error:
+            return error.code, json.load(error)
+
+    try:
+        player = {'Name': 'A', 'Age': '27-10', 'Minutes': '2,430', 'Goals': 7, 'Position': 'FW'}
+        status, body = post([player])
+        assert status == 200 and len(body['predictions']) == 1
+
+        status, body = post([player, dict(player, Minutes='abc')])
+        assert status == 400
+        assert "'Minutes'" in body['error'] and '[1]' in body['error']
+    finally:
+        server.shutdown()
+        server.server_close()